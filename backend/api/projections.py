@@ -0,0 +1,287 @@
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from .serializers import FollowSerializer, RecipeSerializer, UserSerializer
+from recipes.documents import (
+    USER_COLUMNS,
+    recipe_ingredients,
+    recipe_tags,
+    render_documents,
+)
+from recipes.fieldsets import requested_fields
+from recipes.models import Recipe
+from users.models import Follow
+
+User = get_user_model()
+
+
+class Projection:
+    """
+    Строит ответ списка напрямую из строк values(), повторяя
+    представление соответствующего сериализатора.
+    """
+
+    fields = ()
+    sparse = True
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.selected = (
+            requested_fields(request, self.fields)
+            if self.sparse else set(self.fields)
+        )
+
+    def values(self, queryset):
+        raise NotImplementedError
+
+    def project(self, rows):
+        raise NotImplementedError
+
+    def file_url(self, model, field, name, absolute=True):
+        if not name:
+            return None
+        url = model._meta.get_field(field).storage.url(name)
+        return self.request.build_absolute_uri(url) if absolute else url
+
+    def subscribed_ids(self, user_ids):
+        if not self.user.is_authenticated:
+            return set()
+        return set(Follow.objects.filter(
+            user=self.user, following_id__in=user_ids
+        ).values_list('following_id', flat=True))
+
+    def user_data(self, row, subscribed, prefix=''):
+        user_id = row[f'{prefix}id']
+        return {
+            'email': row[f'{prefix}email'],
+            'id': user_id,
+            'username': row[f'{prefix}username'],
+            'first_name': row[f'{prefix}first_name'],
+            'last_name': row[f'{prefix}last_name'],
+            'avatar': self.file_url(User, 'avatar', row[f'{prefix}avatar']),
+            'is_subscribed': user_id in subscribed,
+        }
+
+    def select(self, representation):
+        return {
+            name: representation[name]
+            for name in self.fields if name in self.selected
+        }
+
+
+class UserProjection(Projection):
+    fields = tuple(
+        name for name in UserSerializer.Meta.fields if name != 'password')
+
+    def values(self, queryset):
+        return queryset.values(*USER_COLUMNS, 'avatar')
+
+    def project(self, rows):
+        subscribed = (
+            self.subscribed_ids([row['id'] for row in rows])
+            if 'is_subscribed' in self.selected else set()
+        )
+        return [
+            self.select(self.user_data(row, subscribed)) for row in rows]
+
+
+class RecipeProjection(Projection):
+    fields = RecipeSerializer.Meta.fields
+
+    def values(self, queryset):
+        columns = ['id', 'name', 'image', 'cooking_time']
+        if 'text' in self.selected:
+            columns.append('text')
+        if 'author' in self.selected:
+            columns.extend(f'author__{name}' for name in USER_COLUMNS)
+            columns.append('author__avatar')
+        columns.extend(
+            name for name in ('favorited', 'in_shopping_cart')
+            if name in queryset.query.annotations
+        )
+        return queryset.prefetch_related(None).values(*columns)
+
+    def project(self, rows):
+        recipe_ids = [row['id'] for row in rows]
+        tags = (
+            recipe_tags(recipe_ids) if 'tags' in self.selected else {})
+        ingredients = (
+            recipe_ingredients(recipe_ids)
+            if 'ingredients' in self.selected else {}
+        )
+        subscribed = (
+            self.subscribed_ids({row['author__id'] for row in rows})
+            if 'author' in self.selected else set()
+        )
+        return [
+            self.select({
+                'id': row['id'],
+                'tags': tags.get(row['id'], []),
+                'author': (
+                    self.user_data(row, subscribed, 'author__')
+                    if 'author' in self.selected else None
+                ),
+                'ingredients': ingredients.get(row['id'], []),
+                'is_favorited': row.get('favorited', False),
+                'is_in_shopping_cart': row.get('in_shopping_cart', False),
+                'name': row['name'],
+                'image': self.file_url(Recipe, 'image', row['image']),
+                'text': row.get('text'),
+                'cooking_time': row['cooking_time'],
+            })
+            for row in rows
+        ]
+
+
+class RecipeDocumentProjection(RecipeProjection):
+    """Читает рецепты из RecipeDocument одним запросом."""
+
+    def values(self, queryset):
+        columns = ['id', 'document__data']
+        columns.extend(
+            name for name in ('favorited', 'in_shopping_cart')
+            if name in queryset.query.annotations
+        )
+        return queryset.prefetch_related(None).values(*columns)
+
+    def documents(self, rows):
+        # Рецепты без документа (например, до первого rebuild_documents)
+        # собираются на лету.
+        missing = [row['id'] for row in rows if row['document__data'] is None]
+        rendered = render_documents(missing) if missing else {}
+        return [
+            row['document__data'] or rendered[row['id']].data
+            for row in rows
+        ]
+
+    def project(self, rows):
+        documents = self.documents(rows)
+        subscribed = (
+            self.subscribed_ids({
+                document['author']['id'] for document in documents})
+            if 'author' in self.selected else set()
+        )
+        # JSONB не сохраняет порядок ключей, поэтому вложенные объекты
+        # собираются заново в порядке полей сериализаторов.
+        return [
+            self.select({
+                'id': document['id'],
+                'tags': [
+                    {
+                        'id': tag['id'],
+                        'name': tag['name'],
+                        'slug': tag['slug'],
+                    }
+                    for tag in document['tags']
+                ],
+                'author': self.user_data(document['author'], subscribed),
+                'ingredients': [
+                    {
+                        'id': item['id'],
+                        'name': item['name'],
+                        'measurement_unit': item['measurement_unit'],
+                        'amount': item['amount'],
+                    }
+                    for item in document['ingredients']
+                ],
+                'is_favorited': row.get('favorited', False),
+                'is_in_shopping_cart': row.get('in_shopping_cart', False),
+                'name': document['name'],
+                'image': self.file_url(Recipe, 'image', document['image']),
+                'text': document['text'],
+                'cooking_time': document['cooking_time'],
+            })
+            for row, document in zip(rows, documents)
+        ]
+
+
+class FollowProjection(Projection):
+    fields = FollowSerializer.Meta.fields
+    sparse = False
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values(
+            *USER_COLUMNS, 'avatar')
+
+    def recipes(self, author_ids):
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.filter(author_id__in=author_ids).values(
+            'author_id', 'id', 'name', 'image', 'cooking_time'
+        ):
+            recipes[recipe.pop('author_id')].append({
+                **recipe,
+                # RecipeShortSerializer вызывается без request в контексте,
+                # поэтому отдаёт относительный URL изображения.
+                'image': self.file_url(
+                    Recipe, 'image', recipe['image'], absolute=False),
+            })
+        return recipes
+
+    def project(self, rows):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        author_ids = [row['id'] for row in rows]
+        recipes = self.recipes(author_ids)
+        subscribed = self.subscribed_ids(author_ids)
+        data = []
+        for row in rows:
+            user = self.user_data(row, subscribed)
+            author_recipes = recipes.get(row['id'], [])
+            user['recipes'] = (
+                author_recipes[:int(recipes_limit)]
+                if recipes_limit else author_recipes
+            )
+            user['recipes_count'] = len(author_recipes)
+            data.append(self.select(user))
+        return data
+
+
+class ProjectionMixin:
+    """
+    Отдаёт списки и объекты через проекции из projection_classes вместо
+    сериализаторов. Проекция выбирается по действию вьюсета и подходит
+    только для действий, где объектные разрешения пропускают чтение.
+    """
+
+    projection_classes = {}
+
+    def get_projection(self):
+        projection_class = self.projection_classes.get(self.action)
+        if projection_class is None or not settings.API_READ_PROJECTIONS:
+            return None
+        return projection_class(self.request)
+
+    def projected_response(self, projection, queryset):
+        queryset = projection.values(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.project(page))
+        return Response(projection.project(list(queryset)))
+
+    def list(self, request, *args, **kwargs):
+        projection = self.get_projection()
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+        return self.projected_response(
+            projection, self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        projection = self.get_projection()
+        if projection is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            rows = list(projection.values(
+                self.filter_queryset(self.get_queryset()).filter(**{
+                    self.lookup_field: self.kwargs[lookup_url_kwarg]
+                })
+            )[:1])
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if not rows:
+            raise Http404
+        return Response(projection.project(rows)[0])
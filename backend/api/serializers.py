@@ -1,13 +1,42 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.validators import UniqueValidator
 
+from recipes.constants import MAX_BULK_ITEMS, MAX_LENGTH
+from recipes.documents import rebuild_documents
+from recipes.fieldsets import requested_fields
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.usage import recipe_ingredient_ids, refresh_usage
 
 User = get_user_model()
 
 
+class SparseFieldsetMixin:
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Поля выбираются только у корневого сериализатора или у элемента
+        # корневого списка: вложенные сериализаторы отдаются целиком.
+        if not (
+            self.root is self
+            or (
+                self.parent is self.root
+                and isinstance(self.root, serializers.ListSerializer)
+            )
+        ):
+            return fields
+        selected = requested_fields(self.context.get('request'), fields)
+        return {
+            name: field for name, field in fields.items()
+            if name in selected or field.write_only
+        }
+
+
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField(required=False, allow_null=True)
 
@@ -16,7 +45,7 @@ class AvatarSerializer(serializers.ModelSerializer):
         fields = ('avatar',)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     avatar = Base64ImageField(read_only=True)
     is_subscribed = serializers.SerializerMethodField()
@@ -68,11 +97,7 @@ class UserSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        return User.objects.create_user(**validated_data)
 
 
 class SubscriptionSerializer(serializers.Serializer):
@@ -99,6 +124,8 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class IngredientSerializer(serializers.ModelSerializer):
+    measurement_unit = serializers.ReadOnlyField(
+        source='measurement_unit.name')
 
     class Meta:
         model = Ingredient
@@ -112,7 +139,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
     )
     name = serializers.ReadOnlyField(source='ingredient.name')
     measurement_unit = serializers.ReadOnlyField(
-        source='ingredient.measurement_unit'
+        source='ingredient.measurement_unit.name'
     )
 
     class Meta:
@@ -120,7 +147,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField(required=False, allow_null=False)
@@ -129,6 +156,10 @@ class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientInRecipeSerializer(
         many=True,
         source='recipeingredient_set')
+    name = serializers.CharField(
+        max_length=MAX_LENGTH,
+        validators=[UniqueValidator(queryset=Recipe.objects.all())]
+    )
 
     class Meta:
         model = Recipe
@@ -167,6 +198,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             raise ValidationError('Изображение является обязательным.')
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         tags_data = self.initial_data.get('tags', None)
         ingredients_data = validated_data.pop('recipeingredient_set', None)
@@ -179,8 +211,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         self._create_recipe_ingredients(recipe, ingredients_data)
         recipe.tags.set(tags_data)
+        rebuild_documents([recipe.pk])
+        refresh_usage(
+            recipe_ingredient_ids([recipe.pk]), [recipe.author_id])
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags_data = self.initial_data.get('tags', [])
         ingredients_data = validated_data.pop('recipeingredient_set', [])
@@ -199,8 +235,14 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         instance.save()
         instance.tags.set(tags_data)
+        ingredient_ids = recipe_ingredient_ids([instance.pk])
         instance.recipeingredient_set.all().delete()
         self._create_recipe_ingredients(instance, ingredients_data)
+        rebuild_documents([instance.pk])
+        refresh_usage(
+            ingredient_ids | recipe_ingredient_ids([instance.pk]),
+            [instance.author_id]
+        )
         return instance
 
     def _create_recipe_ingredients(self, recipe, ingredients_data):
@@ -215,11 +257,15 @@ class RecipeSerializer(serializers.ModelSerializer):
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'favorited'):
+            return obj.favorited
         request = self.context['request']
         return request.user.is_authenticated and request.user.favorites.filter(
             recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'in_shopping_cart'):
+            return obj.in_shopping_cart
         request = self.context['request']
         return (request.user.is_authenticated
                 and request.user.shopping_cart.filter(recipe=obj).exists())
@@ -231,6 +277,17 @@ class RecipeShortSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_ITEMS
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
 class FollowSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.IntegerField(
@@ -267,25 +324,20 @@ class ShoppingListDownloadSerializer(serializers.Serializer):
     content = serializers.CharField()
 
     def get_shopping_list_content(self, user):
-        shopping_list = {}
-        for item in RecipeIngredient.objects.filter(
-                recipe__in=user.shopping_cart.values_list(
-                    'recipe', flat=True)):
-            name = item.ingredient.name
-            measurement_unit = item.ingredient.measurement_unit
-            amount = item.amount
-
-            if name in shopping_list:
-                shopping_list[name]['amount'] += amount
-            else:
-                shopping_list[name] = {
-                    'measurement_unit': measurement_unit,
-                    'amount': amount
-                }
+        unit = 'ingredient__measurement_unit'
+        shopping_list = RecipeIngredient.objects.filter(
+            recipe__in_shopping_carts__user=user,
+            recipe__deleted_at__isnull=True
+        ).values(
+            name=F('ingredient__name'),
+            unit_name=Coalesce(f'{unit}__base_unit__name', f'{unit}__name')
+        ).annotate(
+            total=Sum(F('amount') * F(f'{unit}__factor'))
+        ).order_by('name', 'unit_name')
 
         return '\n'.join([
-            f'{name} - {data["amount"]} {data["measurement_unit"]}'
-            for name, data in shopping_list.items()
+            f'{item["name"]} - {item["total"]} {item["unit_name"]}'
+            for item in shopping_list
         ])
 
     def to_representation(self, instance):
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.documents import rebuild_documents
+from recipes.models import Ingredient, MeasurementUnit, Recipe, Tag
+
+User = get_user_model()
+
+
+class RecipeApiTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Имя', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            password='password'
+        )
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        unit, _ = MeasurementUnit.objects.get_or_create(name='г')
+        ingredient = Ingredient.objects.create(
+            name='Соль', measurement_unit=unit)
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        cls.recipe.tags.add(tag)
+        cls.recipe.ingredients.add(
+            ingredient, through_defaults={'amount': 5})
+        rebuild_documents([cls.recipe.pk])
+
+
+@override_settings(API_READ_PROJECTIONS=False)
+class SparseFieldsetTests(RecipeApiTestCase):
+    """Параметры fields и omit не затрагивают вложенные объекты."""
+
+    def test_retrieve_keeps_nested_author(self):
+        response = self.client.get(
+            f'/api/recipes/{self.recipe.pk}/', {'fields': 'author,name'})
+
+        data = response.json()
+        self.assertEqual(list(data), ['author', 'name'])
+        self.assertEqual(data['author']['username'], 'author')
+
+    def test_retrieve_omit_keeps_author_id(self):
+        response = self.client.get(
+            f'/api/recipes/{self.recipe.pk}/', {'omit': 'id'})
+
+        data = response.json()
+        self.assertNotIn('id', data)
+        self.assertEqual(data['author']['id'], self.author.pk)
+
+
+class ProjectionParityTests(RecipeApiTestCase):
+    """Проекции отдают те же байты, что и сериализаторы."""
+
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.reader.follower.create(following=cls.author)
+        cls.reader.favorites.create(recipe=cls.recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.reader)
+
+    def assert_same_content(self, url, params=None):
+        responses = []
+        for enabled in (True, False):
+            with self.settings(API_READ_PROJECTIONS=enabled):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            responses.append(response.content)
+        self.assertEqual(*responses)
+
+    def test_projected_actions(self):
+        recipe_url = f'/api/recipes/{self.recipe.pk}/'
+        cases = [
+            ('/api/users/', None),
+            ('/api/users/', {'fields': 'id,username'}),
+            ('/api/users/', {'omit': 'email'}),
+            ('/api/users/subscriptions/', None),
+            ('/api/users/subscriptions/', {'recipes_limit': 1}),
+            ('/api/recipes/', None),
+            ('/api/recipes/', {'fields': 'author,name'}),
+            ('/api/recipes/', {'omit': 'id'}),
+            ('/api/recipes/', {'is_favorited': 1}),
+            (recipe_url, None),
+            (recipe_url, {'fields': 'author,name'}),
+            (recipe_url, {'omit': 'id'}),
+        ]
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                self.assert_same_content(url, params)
@@ -1,7 +1,13 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from .views import (
+    BootstrapView,
+    IngredientViewSet,
+    RecipeViewSet,
+    TagViewSet,
+    UserViewSet,
+)
 
 app_name = 'api'
 
@@ -15,5 +21,6 @@ router_api.register(r'recipes', RecipeViewSet)
 urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('', include(router_api.urls)),
 ]
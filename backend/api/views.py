@@ -1,17 +1,30 @@
+from urllib.parse import urlsplit, urlunsplit
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch, Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .projections import (
+    FollowProjection,
+    ProjectionMixin,
+    RecipeDocumentProjection,
+    UserProjection,
+)
 from .serializers import (
     AvatarSerializer,
     FollowSerializer,
     IngredientSerializer,
     PasswordSerializer,
+    RecipeIdsSerializer,
     RecipeSerializer,
     RecipeShortSerializer,
     ShoppingListDownloadSerializer,
@@ -20,18 +33,44 @@ from .serializers import (
     TagSerializer,
     UserSerializer,
 )
+from recipes.cache import get_count_generation, get_tag_ids_by_slug, get_tags
+from recipes.conditional import ConditionalGetMixin
+from recipes.constants import COOKING_TIME_FACETS
+from recipes.fieldsets import requested_fields
 from recipes.filters import IngredientFilter, RecipeFilter, UserFilter
-from recipes.models import Favorite, Ingredient, Recipe, ShoppingList, Tag
-from recipes.pagination import PageLimitPaginator
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingList,
+    Tag,
+)
+from recipes.pages import page_exists, page_url
+from recipes.pagination import COUNT_CACHED, COUNT_ESTIMATE, PageLimitPaginator
 from recipes.permissions import IsAuthorOrReadOnly
+from recipes.replicas import ReplicaReadMixin
+from recipes.search import ingredient_index
+from recipes.tasks import purge_deleted
+from recipes.usage import get_recent_usage, get_top_ingredients
 from users.models import Follow
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ProjectionMixin,
+    viewsets.ModelViewSet
+):
+    queryset = User.objects.filter(deleted_at__isnull=True)
     serializer_class = UserSerializer
+    count_strategy = COUNT_ESTIMATE
+    projection_classes = {
+        'list': UserProjection,
+        'subscriptions': FollowProjection,
+    }
     pagination_class = PageLimitPaginator
     permission_classes = (permissions.IsAuthenticated,)
     filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
@@ -46,12 +85,29 @@ class UserViewSet(viewsets.ModelViewSet):
             else [permissions.IsAuthenticated()]
         )
 
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+        purge_deleted.delay(unique=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self.get_object_version('updated_at'),
+            super().retrieve,
+            *args,
+            **kwargs
+        )
+
     @action(
         detail=False,
         methods=['GET'],
         permission_classes=(permissions.IsAuthenticated,)
     )
     def me(self, request):
+        return self.conditional_response(
+            request, (request.user.updated_at,), self._me)
+
+    def _me(self, request):
         serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -114,9 +170,14 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def subscriptions(self, request):
         queryset = User.objects.filter(
-            following__user=request.user).prefetch_related(
-                'recipes').order_by('pk')
-
+            following__user=request.user,
+            deleted_at__isnull=True
+        ).order_by('pk')
+        projection = self.get_projection()
+        if projection is not None:
+            return self.projected_response(projection, queryset)
+
+        queryset = queryset.prefetch_related('recipes')
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = FollowSerializer(
@@ -159,6 +220,7 @@ class UserViewSet(viewsets.ModelViewSet):
                     {'detail': 'Вы уже подписаны на этого пользователя.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            user.touch()
             return Response(FollowSerializer(
                 following,
                 context={'request': request}).data,
@@ -169,6 +231,7 @@ class UserViewSet(viewsets.ModelViewSet):
             subscription = user.follower.filter(following=following)
             if subscription.exists():
                 subscription.delete()
+                user.touch()
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(
                 {'detail': 'Вы не подписаны на этого пользователя.'},
@@ -176,15 +239,61 @@ class UserViewSet(viewsets.ModelViewSet):
             )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class BootstrapView(ReplicaReadMixin, APIView):
+    """
+    Данные для первой отрисовки фронтенда одним запросом: пользователь,
+    теги, первая страница рецептов и счётчики избранного и корзины.
+    Параметры запроса применяются к списку рецептов.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+
+    def _recipes(self, request):
+        view = RecipeViewSet(
+            request=request, args=(), kwargs={}, format_kwarg=None,
+            action='list'
+        )
+        queryset = view.filter_queryset(view.get_queryset())
+        projection = view.get_projection()
+        if projection is not None:
+            data = view.projected_response(projection, queryset).data
+        else:
+            page = view.paginate_queryset(queryset)
+            data = view.get_paginated_response(
+                view.get_serializer(page, many=True).data).data
+        recipes_path = reverse('api:recipe-list')
+        for link in ('next', 'previous'):
+            if data.get(link):
+                url = urlsplit(data[link])
+                data[link] = urlunsplit(url._replace(path=recipes_path))
+        return data
+
+    def get(self, request):
+        user = request.user
+        data = {
+            'user': None,
+            'tags': get_tags(),
+            'recipes': self._recipes(request),
+            'favorites_count': 0,
+            'shopping_cart_count': 0,
+        }
+        if user.is_authenticated:
+            data['user'] = UserSerializer(
+                user, context={'request': request}).data
+            data['favorites_count'] = user.favorites.count()
+            data['shopping_cart_count'] = user.shopping_cart.count()
+        return Response(data)
+
+
+class TagViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Ingredient.objects.all()
+class IngredientViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Ingredient.objects.select_related('measurement_unit')
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
@@ -192,10 +301,45 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ('name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        top = request.query_params.get('top')
+        if top is not None:
+            return self.top(top)
+        name = request.query_params.get('name')
+        if not name or not settings.INGREDIENT_SEARCH_INDEX:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(
+            name, recent=get_recent_usage(request.user)))
+
+    def top(self, limit):
+        if not limit.isdigit() or not (
+            0 < int(limit) <= settings.INGREDIENT_TOP_LIMIT
+        ):
+            raise ValidationError({'top': (
+                'Укажите число от 1 до '
+                f'{settings.INGREDIENT_TOP_LIMIT}.'
+            )})
+        response = Response(get_top_ingredients(int(limit)))
+        patch_cache_control(
+            response, public=True,
+            max_age=settings.INGREDIENT_USAGE_CACHE_TIMEOUT
+        )
+        return response
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ProjectionMixin,
+    viewsets.ModelViewSet
+):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
+    count_strategy = COUNT_CACHED
+    projection_classes = {
+        'list': RecipeDocumentProjection,
+        'retrieve': RecipeDocumentProjection,
+    }
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrReadOnly
@@ -204,8 +348,75 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+
+        fields = requested_fields(
+            self.request, RecipeSerializer.Meta.fields)
+        user = self.request.user
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient__measurement_unit')
+            ))
+        if 'text' not in fields:
+            queryset = queryset.defer('text')
+        if 'is_favorited' in fields and user.is_authenticated:
+            queryset = queryset.annotate(favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))))
+        if 'is_in_shopping_cart' in fields and user.is_authenticated:
+            queryset = queryset.annotate(in_shopping_cart=Exists(
+                ShoppingList.objects.filter(
+                    user=user, recipe=OuterRef('pk'))))
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        if 'ids' in self.request.query_params:
+            return None
+        return super().paginate_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        version = self.filter_queryset(self.get_queryset()).aggregate(
+            updated_at=Max('updated_at'),
+            author_updated_at=Max('author__updated_at')
+        )
+        # Поколение меняется при любой записи рецепта, в том числе при
+        # удалении, которое не сдвигает максимальный updated_at.
+        return self.conditional_response(
+            request,
+            (
+                get_count_generation(Recipe),
+                version['updated_at'],
+                version['author_updated_at']
+            ),
+            super().list,
+            *args,
+            **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self.get_object_version('updated_at', 'author__updated_at'),
+            super().retrieve,
+            *args,
+            **kwargs
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        self.request.user.touch()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.request.user.touch()
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -222,9 +433,57 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         self.object = self.get_object()
-        self.object.delete()
+        self.object.soft_delete()
+        request.user.touch()
+        purge_deleted.delay(unique=True)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _facet_counts(self, queryset):
+        user = self.request.user
+        recipe_tags = Recipe.tags.through.objects
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        counts = {
+            f'tag_{tag_id}': Count('pk', filter=Q(pk__in=recipe_tags.filter(
+                tag_id=tag_id).values('recipe_id')))
+            for tag_id in tag_ids_by_slug.values()
+        }
+        for low, high in COOKING_TIME_FACETS:
+            bucket = Q(cooking_time__gte=low)
+            if high is not None:
+                bucket &= Q(cooking_time__lt=high)
+            counts[f'time_{low}'] = Count('pk', filter=bucket)
+        if user.is_authenticated:
+            counts['favorited'] = Count('pk', filter=Q(Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk')))))
+            counts['in_shopping_cart'] = Count('pk', filter=Q(Exists(
+                ShoppingList.objects.filter(
+                    user=user, recipe=OuterRef('pk')))))
+        counts = queryset.aggregate(total=Count('pk'), **counts)
+
+        return {
+            'count': counts['total'],
+            'tags': {
+                slug: counts[f'tag_{tag_id}']
+                for slug, tag_id in tag_ids_by_slug.items()
+            },
+            'cooking_time': [
+                {'min': low, 'max': high, 'count': counts[f'time_{low}']}
+                for low, high in COOKING_TIME_FACETS
+            ],
+            'is_favorited': counts.get('favorited', 0),
+            'is_in_shopping_cart': counts.get('in_shopping_cart', 0),
+        }
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=(permissions.AllowAny,)
+    )
+    def facets(self, request):
+        queryset = self.filter_queryset(Recipe.objects.all())
+        return Response(
+            self._facet_counts(queryset), status=status.HTTP_200_OK)
+
     def _manage_item(
             self,
             request,
@@ -243,6 +502,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             model.objects.create(user=user, recipe=recipe)
+            user.touch()
             serializer = RecipeShortSerializer(
                 recipe,
                 context={'request': request}
@@ -257,8 +517,54 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     {'detail': error_message_not_found},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            user.touch()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _manage_items(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        user = request.user
+        present = set(model.objects.filter(
+            user=user, recipe__in=recipe_ids
+        ).values_list('recipe', flat=True))
+
+        if request.method == 'POST':
+            existing = set(Recipe.objects.filter(
+                pk__in=recipe_ids).values_list('pk', flat=True))
+            new_ids = existing - present
+            model.objects.bulk_create(
+                [model(user=user, recipe_id=pk) for pk in new_ids],
+                ignore_conflicts=True
+            )
+            results = [
+                {
+                    'id': pk,
+                    'status': (
+                        'not_found' if pk not in existing
+                        else 'added' if pk in new_ids
+                        else 'exists'
+                    )
+                }
+                for pk in recipe_ids
+            ]
+            changed = bool(new_ids)
+
+        if request.method == 'DELETE':
+            model.objects.filter(user=user, recipe__in=present).delete()
+            results = [
+                {
+                    'id': pk,
+                    'status': 'removed' if pk in present else 'not_found'
+                }
+                for pk in recipe_ids
+            ]
+            changed = bool(present)
+
+        if changed:
+            user.touch()
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
     @action(
         detail=True,
         methods=['GET'],
@@ -284,6 +590,27 @@ class RecipeViewSet(viewsets.ModelViewSet):
             error_message_not_found='Рецепт не найден в списке покупок.'
         )
 
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='shopping_cart'
+    )
+    def manage_shopping_cart_bulk(self, request):
+        return self._manage_items(request, model=ShoppingList)
+
+    @action(
+        detail=False,
+        methods=['DELETE'],
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='shopping_cart/clear'
+    )
+    def clear_shopping_cart(self, request):
+        deleted, _ = request.user.shopping_cart.all().delete()
+        if deleted:
+            request.user.touch()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(
         detail=False,
         methods=['get'],
@@ -314,11 +641,22 @@ class RecipeViewSet(viewsets.ModelViewSet):
             error_message_not_found='Рецепт не найден в избранном.'
         )
 
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        permission_classes=(permissions.IsAuthenticated,),
+        url_path='favorite'
+    )
+    def manage_favorites_bulk(self, request):
+        return self._manage_items(request, model=Favorite)
+
 
 class ShortLinkViewSet(viewsets.ViewSet):
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
 
     def redirect_short_link(self, request, short_id=None):
         recipe = get_object_or_404(Recipe, short_id=short_id)
+        if page_exists(recipe.id):
+            return redirect(page_url(recipe.id))
         recipe_detail_url = f'/recipes/{recipe.id}/'
         return redirect(recipe_detail_url)
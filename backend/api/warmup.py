@@ -0,0 +1,73 @@
+import logging
+import time
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import get_resolver, resolve
+
+from recipes.cache import get_tag_ids_by_slug
+from recipes.search import ingredient_index
+
+logger = logging.getLogger(__name__)
+
+WARMUP_URLS = (
+    '/api/tags/',
+    '/api/ingredients/?name=а',
+    '/api/recipes/?limit=1',
+    '/api/users/?limit=1',
+)
+
+
+def _compile_urls():
+    get_resolver().url_patterns
+    for url in WARMUP_URLS:
+        resolve(url.split('?')[0])
+
+
+def _warm_views():
+    host = next((
+        host.lstrip('.') for host in settings.ALLOWED_HOSTS
+        if host and host != '*'
+    ), 'localhost')
+    factory = RequestFactory(HTTP_HOST=host)
+    for url in WARMUP_URLS:
+        path, _, query = url.partition('?')
+        match = resolve(path)
+        response = match.func(
+            factory.get(url), *match.args, **match.kwargs)
+        response.render()
+
+
+def _build_ingredient_index():
+    if settings.INGREDIENT_SEARCH_INDEX:
+        ingredient_index.build()
+
+
+STAGES = (
+    ('urls', _compile_urls),
+    ('reference data', get_tag_ids_by_slug),
+    ('ingredient index', _build_ingredient_index),
+    ('views', _warm_views),
+)
+
+
+def warm_up():
+    """
+    Прогревает воркер до первого запроса и возвращает время этапов, мс.
+
+    Соединения с базой принадлежат потоку, а gthread-воркер обслуживает
+    запросы в других потоках, поэтому открытые здесь соединения
+    закрываются, а не остаются висеть.
+    """
+    timings = {}
+    try:
+        for name, stage in STAGES:
+            start = time.perf_counter()
+            try:
+                stage()
+            except Exception:
+                logger.exception('Warm-up stage "%s" failed', name)
+            timings[name] = (time.perf_counter() - start) * 1000
+    finally:
+        connections.close_all()
+    return timings
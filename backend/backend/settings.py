@@ -1,5 +1,6 @@
 # flake8: noqa
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -28,10 +29,16 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
     'users.apps.UsersConfig',
+    'tasks.apps.TasksConfig',
+    'profiling.apps.ProfilingConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'profiling.middleware.ProfilerMiddleware',
+    'profiling.middleware.SlowQueryMiddleware',
+    'profiling.middleware.MemoryProfilerMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,10 +75,61 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+DB_REPLICA_HOSTS = [host for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host]
+
+for index, replica in enumerate(DB_REPLICA_HOSTS):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['recipes.replicas.PrimaryReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+# Локальный кэш процесса для справочников и общий кэш для поколений,
+# которые должны видеть все воркеры. Таблица общего кэша по умолчанию
+# создаётся командой createcachetable.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'django_cache'),
+    },
+}
+
+PASSWORD_HASHER = os.getenv(
+    'PASSWORD_HASHER', 'argon2' if find_spec('argon2') else 'pbkdf2')
+PASSWORD_HASHER_CHOICES = {
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+# Первый хэшер используется для новых паролей, остальные только
+# проверяют старые хэши, которые пересчитываются при входе.
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CHOICES[PASSWORD_HASHER],
+    *(
+        hasher for name, hasher in PASSWORD_HASHER_CHOICES.items()
+        if name != PASSWORD_HASHER
+    ),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 1))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -95,6 +153,17 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'recipes.pagination.PageLimitPaginator',
+    'DEFAULT_RENDERER_CLASSES': [
+        'recipes.renderers.ORJSONRenderer',
+        *(['recipes.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'recipes.renderers.ORJSONParser',
+        *(['recipes.renderers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -102,6 +171,48 @@ REST_FRAMEWORK = {
     ],
 }
 
+PAGINATION_COUNT_STRATEGY = os.getenv('PAGINATION_COUNT_STRATEGY', 'exact')
+COUNT_CACHE_TIMEOUT = int(os.getenv('COUNT_CACHE_TIMEOUT', 60))
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv('COUNT_ESTIMATE_THRESHOLD', 10000))
+
+API_READ_PROJECTIONS = os.getenv('API_READ_PROJECTIONS', 'true').lower() in {'true', '1', 'yes', 'on'}
+
+INGREDIENT_SEARCH_INDEX = os.getenv('INGREDIENT_SEARCH_INDEX', 'true').lower() in {'true', '1', 'yes', 'on'}
+INGREDIENT_SEARCH_THRESHOLD = float(
+    os.getenv('INGREDIENT_SEARCH_THRESHOLD', 0.3))
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 50))
+INGREDIENT_SEARCH_CANDIDATES = int(
+    os.getenv('INGREDIENT_SEARCH_CANDIDATES', 2000))
+INGREDIENT_USAGE_WEIGHT = float(os.getenv('INGREDIENT_USAGE_WEIGHT', 0.2))
+INGREDIENT_RECENT_WEIGHT = float(os.getenv('INGREDIENT_RECENT_WEIGHT', 0.3))
+INGREDIENT_RECENT_RECIPES = int(os.getenv('INGREDIENT_RECENT_RECIPES', 20))
+INGREDIENT_USAGE_CACHE_TIMEOUT = int(
+    os.getenv('INGREDIENT_USAGE_CACHE_TIMEOUT', 300))
+INGREDIENT_TOP_LIMIT = int(os.getenv('INGREDIENT_TOP_LIMIT', 100))
+
+COMPRESSION_MIN_LENGTH = int(os.getenv('COMPRESSION_MIN_LENGTH', 1024))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
+
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', 5))
+TASK_RETRY_BACKOFF = int(os.getenv('TASK_RETRY_BACKOFF', 10))
+TASK_RETRY_BACKOFF_MAX = int(os.getenv('TASK_RETRY_BACKOFF_MAX', 3600))
+TASK_TIMEOUT = int(os.getenv('TASK_TIMEOUT', 600))
+TASK_POLL_INTERVAL = float(os.getenv('TASK_POLL_INTERVAL', 1))
+TASK_DONE_RETENTION = int(os.getenv('TASK_DONE_RETENTION', 7))
+TASK_FAILED_RETENTION = int(os.getenv('TASK_FAILED_RETENTION', 30))
+TASK_PRUNE_INTERVAL = int(os.getenv('TASK_PRUNE_INTERVAL', 3600))
+
+PROFILER_QUERY_PARAM = 'profile'
+PROFILER_TOKEN_MAX_AGE = int(os.getenv('PROFILER_TOKEN_MAX_AGE', 3600))
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(
+    os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1))
+
+MEMORY_PROFILING = os.getenv('MEMORY_PROFILING', 'false').lower() in {'true', '1', 'yes', 'on'}
+MEMORY_PROFILING_FRAMES = int(os.getenv('MEMORY_PROFILING_FRAMES', 1))
+MEMORY_PROFILING_TOP = int(os.getenv('MEMORY_PROFILING_TOP', 10))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
 }
@@ -123,6 +234,11 @@ STATIC_ROOT = '/backend_static/static/'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/media'
+DEFAULT_FILE_STORAGE = 'recipes.storage.ContentAddressedStorage'
+MEDIA_ORPHAN_MIN_AGE = int(os.getenv('MEDIA_ORPHAN_MIN_AGE', 3600))
+STATIC_PAGES_ROOT = os.path.join(MEDIA_ROOT, 'pages')
+STATIC_PAGES_URL = '/pages/'
+SITE_URL = os.getenv('SITE_URL', 'http://localhost').rstrip('/')
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
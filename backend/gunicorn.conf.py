@@ -0,0 +1,18 @@
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))
+
+
+def post_worker_init(worker):
+    from api.warmup import warm_up
+
+    timings = warm_up()
+    worker.log.info(
+        'Warm-up finished: %s',
+        ', '.join(f'{stage} {elapsed:.1f} ms'
+                  for stage, elapsed in timings.items())
+    )
@@ -0,0 +1,149 @@
+import json
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import MemoryProfile, RequestProfile, SlowQuery
+from .slow_queries import top_fingerprints
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'method', 'path', 'status_code', 'duration_ms',
+        'query_count', 'query_time_ms', 'user', 'created_at'
+    )
+    list_filter = ('method', 'status_code')
+    search_fields = ('path',)
+    list_select_related = ('user',)
+    exclude = ('stats', 'queries')
+    readonly_fields = (
+        'user', 'method', 'path', 'status_code', 'duration_ms',
+        'query_count', 'query_time_ms', 'created_at', 'downloads',
+        'profile_summary', 'query_list'
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_stats),
+                name='profiling_requestprofile_download',
+            ),
+            path(
+                '<int:pk>/queries/',
+                self.admin_site.admin_view(self.download_queries),
+                name='profiling_requestprofile_queries',
+            ),
+        ] + super().get_urls()
+
+    def download_stats(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(
+            bytes(profile.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = (
+            f'attachment; filename="profile_{pk}.prof"')
+        return response
+
+    def download_queries(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(
+            json.dumps(profile.queries, ensure_ascii=False, indent=2),
+            content_type='application/json')
+        response['Content-Disposition'] = (
+            f'attachment; filename="queries_{pk}.json"')
+        return response
+
+    @admin.display(description='Скачать')
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">cProfile (.prof)</a> | <a href="{}">SQL (.json)</a>',
+            reverse('admin:profiling_requestprofile_download', args=[obj.pk]),
+            reverse('admin:profiling_requestprofile_queries', args=[obj.pk]),
+        )
+
+    @admin.display(description='Сводка cProfile')
+    def profile_summary(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary())
+
+    @admin.display(description='SQL-запросы')
+    def query_list(self, obj):
+        return format_html('<pre>{}</pre>', '\n\n'.join(
+            f'[{query["duration_ms"]:.1f} мс, {query["alias"]}] '
+            f'{query["sql"]}'
+            for query in obj.queries
+        ))
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('statement_preview', 'duration_ms', 'view', 'created_at')
+    list_filter = ('alias', 'view')
+    search_fields = ('statement', 'view', 'fingerprint')
+    readonly_fields = (
+        'fingerprint', 'statement', 'sql', 'params', 'alias',
+        'duration_ms', 'view', 'frame', 'plan', 'created_at'
+    )
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'report/',
+                self.admin_site.admin_view(self.report),
+                name='profiling_slowquery_report',
+            ),
+        ] + super().get_urls()
+
+    def report(self, request):
+        hours = request.GET.get('hours')
+        hours = int(hours) if hours and hours.isdigit() else None
+        return TemplateResponse(
+            request,
+            'admin/profiling/slowquery/report.html',
+            {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'title': 'Топ запросов по суммарному времени',
+                'hours': hours,
+                'rows': top_fingerprints(hours),
+            },
+        )
+
+    @admin.display(description='Запрос')
+    def statement_preview(self, obj):
+        return obj.statement[:120]
+
+
+@admin.register(MemoryProfile)
+class MemoryProfileAdmin(admin.ModelAdmin):
+    list_display = ('view', 'method', 'path', 'peak_kb', 'retained_kb',
+                    'created_at')
+    list_filter = ('view',)
+    search_fields = ('view', 'path')
+    readonly_fields = (
+        'view', 'method', 'path', 'peak_kb', 'retained_kb', 'instances',
+        'top_sites', 'created_at'
+    )
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class ProfilingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'profiling'
+    verbose_name = 'Профилирование'
+
+    def ready(self):
+        from .slow_queries import install
+
+        connection_created.connect(install)
@@ -0,0 +1,5 @@
+MAX_PATH_LENGTH = 2048
+MAX_METHOD_LENGTH = 8
+MAX_ALIAS_LENGTH = 64
+MAX_VIEW_LENGTH = 255
+FINGERPRINT_LENGTH = 40
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from profiling.memory import memory_report
+
+
+class Command(BaseCommand):
+    help = 'Show per-view memory usage recorded by MemoryProfilerMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of views to show',
+        )
+        parser.add_argument(
+            '--hours',
+            type=int,
+            help='Only consider requests recorded in the last N hours',
+        )
+        parser.add_argument(
+            '--sites',
+            type=int,
+            default=5,
+            help='Number of allocation sites and models per view',
+        )
+
+    def handle(self, *args, **options):
+        rows = memory_report(
+            options['hours'], options['limit'], options['sites'])
+        for row in rows:
+            self.stdout.write(
+                f'{row["view"] or "-"}: {row["requests"]} requests, '
+                f'peak {row["avg_peak_kb"]:.0f} KB avg / '
+                f'{row["max_peak_kb"]:.0f} KB max, retained '
+                f'{row["avg_retained_kb"]:.0f} KB avg / '
+                f'{row["total_retained_kb"]:.0f} KB total'
+            )
+            for model, count in row['instances']:
+                self.stdout.write(f'    {count:>10} x {model}')
+            for site, size in row['top_sites']:
+                self.stdout.write(f'    {size:>10.0f} KB  {site}')
+        if not rows:
+            self.stdout.write('No memory profiles recorded')
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from profiling.middleware import make_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Issue a signed token that enables request profiling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of a staff user')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            email=options['email'], is_staff=True, deleted_at__isnull=True
+        ).first()
+        if user is None:
+            raise CommandError('Staff user not found')
+        self.stdout.write(make_token(user))
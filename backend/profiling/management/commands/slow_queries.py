@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from profiling.slow_queries import top_fingerprints
+
+
+class Command(BaseCommand):
+    help = 'Show slow query fingerprints ordered by total time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of fingerprints to show',
+        )
+        parser.add_argument(
+            '--hours',
+            type=int,
+            help='Only consider queries recorded in the last N hours',
+        )
+
+    def handle(self, *args, **options):
+        rows = top_fingerprints(options['hours'], options['limit'])
+        for row in rows:
+            self.stdout.write(
+                f'{row["total_ms"]:10.0f} ms total  '
+                f'{row["calls"]:6} calls  '
+                f'{row["avg_ms"]:8.1f} ms avg  '
+                f'{row["max_ms"]:8.1f} ms max  {row["view"]}'
+            )
+            self.stdout.write(f'    {row["statement"]}')
+        if not rows:
+            self.stdout.write('No slow queries recorded')
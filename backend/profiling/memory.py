@@ -0,0 +1,37 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from .models import MemoryProfile
+
+
+def memory_report(hours=None, limit=20, sites=5):
+    """
+    Память по представлениям: пик и остаток после запроса, самые
+    частые модели и места выделения за период.
+    """
+    queryset = MemoryProfile.objects.all()
+    if hours:
+        queryset = queryset.filter(
+            created_at__gte=timezone.now() - timedelta(hours=hours))
+    rows = list(queryset.values('view').annotate(
+        requests=Count('id'),
+        avg_peak_kb=Avg('peak_kb'),
+        max_peak_kb=Max('peak_kb'),
+        avg_retained_kb=Avg('retained_kb'),
+        total_retained_kb=Sum('retained_kb'),
+    ).order_by('-max_peak_kb')[:limit])
+
+    instances = defaultdict(Counter)
+    site_sizes = defaultdict(Counter)
+    for profile in queryset.filter(
+        view__in=[row['view'] for row in rows]
+    ).values('view', 'instances', 'top_sites').iterator():
+        instances[profile['view']].update(profile['instances'])
+        for site in profile['top_sites']:
+            site_sizes[profile['view']][site['site']] += site['size_kb']
+    for row in rows:
+        row['instances'] = instances[row['view']].most_common(sites)
+        row['top_sites'] = site_sizes[row['view']].most_common(sites)
+    return rows
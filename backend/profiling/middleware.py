@@ -0,0 +1,212 @@
+import cProfile
+import marshal
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.models.signals import post_init
+
+from .constants import MAX_PATH_LENGTH, MAX_VIEW_LENGTH
+from .models import MemoryProfile, RequestProfile
+from .slow_queries import current_view, view_name
+
+TOKEN_SALT = 'profiling.token'
+
+User = get_user_model()
+
+# cProfile нельзя запускать в нескольких потоках одного процесса
+# одновременно, поэтому параллельные запросы идут без профилирования.
+profiler_lock = threading.Lock()
+# tracemalloc считает память всего процесса, поэтому одновременно
+# измеряется только один запрос.
+memory_lock = threading.Lock()
+created_instances = ContextVar('created_instances', default=None)
+
+
+def make_token(user):
+    return signing.dumps(user.pk, salt=TOKEN_SALT)
+
+
+def get_profiling_user(token):
+    try:
+        pk = signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(
+        pk=pk, is_staff=True, is_active=True, deleted_at__isnull=True
+    ).first()
+
+
+class QueryRecorder:
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': repr(params),
+                'many': many,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+            })
+
+
+class ProfilerMiddleware:
+    """
+    Профилирует запрос сотрудника, передавшего подписанный токен
+    в заголовке X-Profile или параметре ?profile=.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = (
+            request.META.get('HTTP_X_PROFILE')
+            or request.GET.get(settings.PROFILER_QUERY_PARAM)
+        )
+        if not token:
+            return self.get_response(request)
+        user = get_profiling_user(token)
+        if user is None or not profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request, user)
+        finally:
+            profiler_lock.release()
+
+    def get_path(self, request):
+        query = request.GET.copy()
+        query.pop(settings.PROFILER_QUERY_PARAM, None)
+        if not query:
+            return request.path
+        return f'{request.path}?{query.urlencode()}'
+
+    def profile(self, request, user):
+        recorders = [QueryRecorder(alias) for alias in connections]
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for recorder in recorders:
+                stack.enter_context(
+                    connections[recorder.alias].execute_wrapper(recorder))
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = (time.perf_counter() - start) * 1000
+
+        profiler.create_stats()
+        queries = [
+            query for recorder in recorders for query in recorder.queries
+        ]
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method,
+            path=self.get_path(request)[:MAX_PATH_LENGTH],
+            status_code=response.status_code,
+            duration_ms=duration,
+            query_count=len(queries),
+            query_time_ms=sum(query['duration_ms'] for query in queries),
+            stats=marshal.dumps(profiler.stats),
+            queries=queries,
+        )
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Запоминает текущее представление для журнала медленных запросов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set('')
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(view_name(view_func, request.method))
+
+
+def count_instance(sender, **kwargs):
+    counter = created_instances.get()
+    if counter is not None:
+        counter[sender._meta.label] += 1
+
+
+class MemoryProfilerMiddleware:
+    """
+    При MEMORY_PROFILING=True записывает пиковую и оставшуюся после
+    запроса память, главные места выделения и число созданных объектов
+    моделей. Без настройки middleware отключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.MEMORY_PROFILING_FRAMES)
+        post_init.connect(count_instance)
+
+    def __call__(self, request):
+        if not memory_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.measure(request)
+        finally:
+            memory_lock.release()
+
+    def measure(self, request):
+        counter = Counter()
+        token = created_instances.set(counter)
+        before = tracemalloc.take_snapshot()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            response = self.get_response(request)
+        finally:
+            created_instances.reset(token)
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = after.filter_traces(filters).compare_to(
+            before.filter_traces(filters), 'lineno')
+        top_sites = [
+            {
+                'site': str(stat.traceback),
+                'size_kb': stat.size_diff / 1024,
+                'count': stat.count_diff,
+            }
+            for stat in stats if stat.size_diff > 0
+        ][:settings.MEMORY_PROFILING_TOP]
+        MemoryProfile.objects.create(
+            view=current_view.get()[:MAX_VIEW_LENGTH],
+            method=request.method,
+            path=request.path[:MAX_PATH_LENGTH],
+            peak_kb=(peak - baseline) / 1024,
+            retained_kb=(current - baseline) / 1024,
+            instances=dict(counter),
+            top_sites=top_sites,
+        )
+        return response
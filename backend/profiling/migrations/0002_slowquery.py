@@ -0,0 +1,34 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=40, verbose_name='Отпечаток')),
+                ('statement', models.TextField(verbose_name='Нормализованный запрос')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Параметры')),
+                ('alias', models.CharField(max_length=64, verbose_name='База данных')),
+                ('duration_ms', models.FloatField(verbose_name='Время, мс')),
+                ('view', models.CharField(blank=True, max_length=255, verbose_name='Представление')),
+                ('frame', models.TextField(blank=True, verbose_name='Место вызова')),
+                ('plan', models.TextField(blank=True, verbose_name='План выполнения')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Записан')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
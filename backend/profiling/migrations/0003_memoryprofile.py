@@ -0,0 +1,32 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling', '0002_slowquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemoryProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view', models.CharField(blank=True, db_index=True, max_length=255, verbose_name='Представление')),
+                ('method', models.CharField(max_length=8, verbose_name='Метод')),
+                ('path', models.CharField(max_length=2048, verbose_name='Путь')),
+                ('peak_kb', models.FloatField(verbose_name='Пик, КБ')),
+                ('retained_kb', models.FloatField(verbose_name='Осталось после запроса, КБ')),
+                ('instances', models.JSONField(default=dict, verbose_name='Созданные объекты моделей')),
+                ('top_sites', models.JSONField(default=list, verbose_name='Места выделения памяти')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Записан')),
+            ],
+            options={
+                'verbose_name': 'Профиль памяти',
+                'verbose_name_plural': 'Профили памяти',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
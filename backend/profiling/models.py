@@ -0,0 +1,173 @@
+import marshal
+import pstats
+from io import StringIO
+from django.conf import settings
+from django.db import models
+
+from .constants import (
+    FINGERPRINT_LENGTH,
+    MAX_ALIAS_LENGTH,
+    MAX_METHOD_LENGTH,
+    MAX_PATH_LENGTH,
+    MAX_VIEW_LENGTH,
+)
+
+
+class StoredStats:
+    """Обёртка, позволяющая передать сохранённые данные в pstats.Stats."""
+
+    def __init__(self, data):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+
+class RequestProfile(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='request_profiles',
+        verbose_name='Пользователь',
+    )
+    method = models.CharField(
+        max_length=MAX_METHOD_LENGTH,
+        verbose_name='Метод',
+    )
+    path = models.CharField(
+        max_length=MAX_PATH_LENGTH,
+        verbose_name='Путь',
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='Код ответа',
+    )
+    duration_ms = models.FloatField(
+        verbose_name='Время, мс',
+    )
+    query_count = models.PositiveIntegerField(
+        verbose_name='Запросов к БД',
+    )
+    query_time_ms = models.FloatField(
+        verbose_name='Время в БД, мс',
+    )
+    stats = models.BinaryField(
+        verbose_name='Данные cProfile',
+    )
+    queries = models.JSONField(
+        default=list,
+        verbose_name='SQL-запросы',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создан',
+    )
+
+    class Meta:
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} мс)'
+
+    def summary(self, sort='cumulative', limit=40):
+        stream = StringIO()
+        stats = pstats.Stats(StoredStats(bytes(self.stats)), stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class SlowQuery(models.Model):
+    fingerprint = models.CharField(
+        max_length=FINGERPRINT_LENGTH,
+        db_index=True,
+        verbose_name='Отпечаток',
+    )
+    statement = models.TextField(
+        verbose_name='Нормализованный запрос',
+    )
+    sql = models.TextField(
+        verbose_name='SQL',
+    )
+    params = models.TextField(
+        blank=True,
+        verbose_name='Параметры',
+    )
+    alias = models.CharField(
+        max_length=MAX_ALIAS_LENGTH,
+        verbose_name='База данных',
+    )
+    duration_ms = models.FloatField(
+        verbose_name='Время, мс',
+    )
+    view = models.CharField(
+        max_length=MAX_VIEW_LENGTH,
+        blank=True,
+        verbose_name='Представление',
+    )
+    frame = models.TextField(
+        blank=True,
+        verbose_name='Место вызова',
+    )
+    plan = models.TextField(
+        blank=True,
+        verbose_name='План выполнения',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Записан',
+    )
+
+    class Meta:
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.statement[:80]} ({self.duration_ms:.0f} мс)'
+
+
+class MemoryProfile(models.Model):
+    view = models.CharField(
+        max_length=MAX_VIEW_LENGTH,
+        blank=True,
+        db_index=True,
+        verbose_name='Представление',
+    )
+    method = models.CharField(
+        max_length=MAX_METHOD_LENGTH,
+        verbose_name='Метод',
+    )
+    path = models.CharField(
+        max_length=MAX_PATH_LENGTH,
+        verbose_name='Путь',
+    )
+    peak_kb = models.FloatField(
+        verbose_name='Пик, КБ',
+    )
+    retained_kb = models.FloatField(
+        verbose_name='Осталось после запроса, КБ',
+    )
+    instances = models.JSONField(
+        default=dict,
+        verbose_name='Созданные объекты моделей',
+    )
+    top_sites = models.JSONField(
+        default=list,
+        verbose_name='Места выделения памяти',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Записан',
+    )
+
+    class Meta:
+        verbose_name = 'Профиль памяти'
+        verbose_name_plural = 'Профили памяти'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.view or self.path} ({self.peak_kb:.0f} КБ)'
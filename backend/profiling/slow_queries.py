@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import random
+import re
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.utils import timezone
+
+from .constants import MAX_VIEW_LENGTH
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+current_view = ContextVar('current_view', default='')
+# Запросы самого журнала (EXPLAIN и INSERT) не должны попадать в журнал.
+recording = ContextVar('recording', default=False)
+
+re_in_list = re.compile(r'IN \((?:%s, )*%s\)')
+re_literal = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+BASE_DIR = str(settings.BASE_DIR)
+SKIPPED_DIRS = ('site-packages', f'{BASE_DIR}/profiling/')
+
+
+def normalize(sql):
+    sql = re_in_list.sub('IN (...)', sql)
+    sql = re_literal.sub('?', sql)
+    return ' '.join(sql.split())
+
+
+def fingerprint(statement):
+    return hashlib.sha1(statement.encode()).hexdigest()
+
+
+def view_name(view_func, method):
+    """RecipeViewSet.list для вьюсетов DRF, путь к функции для остальных."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def calling_frame():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(BASE_DIR) and not any(
+            skipped in frame.filename for skipped in SKIPPED_DIRS
+        ):
+            path = frame.filename[len(BASE_DIR) + 1:]
+            return f'{path}:{frame.lineno} in {frame.name}\n{frame.line}'
+    return ''
+
+
+def should_explain(connection, sql, many):
+    return (
+        connection.vendor == 'postgresql'
+        and not many
+        and sql.lstrip()[:6].upper() == 'SELECT'
+        and 'FOR UPDATE' not in sql.upper()
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    )
+
+
+def explain(connection, sql, params):
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError:
+        logger.exception('Failed to explain slow query')
+        return ''
+
+
+class SlowQueryLogger:
+    """
+    Обёртка execute_wrapper, записывающая запросы дольше
+    SLOW_QUERY_THRESHOLD_MS в SlowQuery.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        if recording.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = (time.perf_counter() - start) * 1000
+        if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+            token = recording.set(True)
+            try:
+                self.record(sql, params, many, duration)
+            finally:
+                recording.reset(token)
+        return result
+
+    def record(self, sql, params, many, duration):
+        statement = normalize(sql)
+        plan = (
+            explain(self.connection, sql, params)
+            if should_explain(self.connection, sql, many) else ''
+        )
+        try:
+            with transaction.atomic():
+                SlowQuery.objects.create(
+                    fingerprint=fingerprint(statement),
+                    statement=statement,
+                    sql=sql,
+                    params=repr(params),
+                    alias=self.connection.alias,
+                    duration_ms=duration,
+                    view=current_view.get()[:MAX_VIEW_LENGTH],
+                    frame=calling_frame(),
+                    plan=plan,
+                )
+        except DatabaseError:
+            logger.exception('Failed to record slow query')
+
+
+def install(sender, connection, **kwargs):
+    if settings.SLOW_QUERY_THRESHOLD_MS and not any(
+        isinstance(wrapper, SlowQueryLogger)
+        for wrapper in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(SlowQueryLogger(connection))
+
+
+def top_fingerprints(hours=None, limit=20):
+    queryset = SlowQuery.objects.all()
+    if hours:
+        queryset = queryset.filter(
+            created_at__gte=timezone.now() - timedelta(hours=hours))
+    return queryset.values('fingerprint').annotate(
+        statement=Min('statement'),
+        view=Max('view'),
+        calls=Count('id'),
+        total_ms=Sum('duration_ms'),
+        avg_ms=Avg('duration_ms'),
+        max_ms=Max('duration_ms'),
+        last_seen=Max('created_at'),
+    ).order_by('-total_ms')[:limit]
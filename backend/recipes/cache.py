@@ -0,0 +1,80 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache, caches
+
+from .models import Tag
+
+TAG_GENERATION_CACHE_KEY = 'recipes:tag-generation'
+TAG_SLUGS_CACHE_KEY = 'recipes:tag-ids-by-slug:{}'
+TAGS_CACHE_KEY = 'recipes:tags:{}'
+COUNT_GENERATION_CACHE_KEY = 'recipes:count-generation:{}'
+COUNT_CACHE_KEY = 'recipes:count:{}:{}:{}'
+REFERENCE_CACHE_TIMEOUT = 300
+SHARED_CACHE = 'shared'
+
+
+def get_tag_ids_by_slug():
+    """
+    Идентификаторы тегов по слагам из кэша процесса. Ключ включает
+    поколение из общего кэша, поэтому изменение тега в одном процессе
+    сбрасывает кэш во всех. Так же кэшируется и get_tags.
+    """
+    return cache.get_or_set(
+        TAG_SLUGS_CACHE_KEY.format(get_generation(TAG_GENERATION_CACHE_KEY)),
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        REFERENCE_CACHE_TIMEOUT
+    )
+
+
+def get_tags():
+    return cache.get_or_set(
+        TAGS_CACHE_KEY.format(get_generation(TAG_GENERATION_CACHE_KEY)),
+        lambda: list(Tag.objects.values('id', 'name', 'slug')),
+        REFERENCE_CACHE_TIMEOUT
+    )
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids_by_slug()]
+
+
+def invalidate_tags(**kwargs):
+    bump_generation(TAG_GENERATION_CACHE_KEY)
+
+
+def get_generation(key):
+    """Поколение из общего кэша, одинаковое во всех процессах."""
+    return caches[SHARED_CACHE].get_or_set(key, 0, None)
+
+
+def bump_generation(key):
+    shared = caches[SHARED_CACHE]
+    try:
+        return shared.incr(key)
+    except ValueError:
+        shared.set(key, 1, None)
+        return 1
+
+
+def get_count_generation(model):
+    return get_generation(
+        COUNT_GENERATION_CACHE_KEY.format(model._meta.label_lower))
+
+
+def get_cached_count(queryset, signature):
+    """
+    Точное количество объектов, закэшированное по сигнатуре фильтров.
+    Сбрасывается увеличением поколения при записи в модель.
+    """
+    key = COUNT_CACHE_KEY.format(
+        queryset.model._meta.label_lower,
+        get_count_generation(queryset.model),
+        hashlib.md5(signature.encode()).hexdigest()
+    )
+    return cache.get_or_set(
+        key, queryset.count, settings.COUNT_CACHE_TIMEOUT)
+
+
+def invalidate_counts(sender, **kwargs):
+    bump_generation(
+        COUNT_GENERATION_CACHE_KEY.format(sender._meta.label_lower))
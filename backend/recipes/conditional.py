@@ -0,0 +1,54 @@
+import hashlib
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def viewer_version(request):
+    user = request.user
+    if user.is_authenticated:
+        return user.pk, user.updated_at
+    return ()
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified по версии ресурса, не сериализуя его."""
+
+    def get_object_version(self, *fields):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return self.get_queryset().filter(**{
+                self.lookup_field: self.kwargs[lookup_url_kwarg]
+            }).values_list(*fields).first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def conditional_response(self, request, version, handler,
+                             *args, **kwargs):
+        if version is None:
+            return handler(request, *args, **kwargs)
+
+        viewer = viewer_version(request)
+        timestamps = [
+            value for value in (*version, *viewer)
+            if isinstance(value, datetime)
+        ]
+        last_modified = (
+            int(max(timestamps).timestamp()) if timestamps else None
+        )
+        etag = quote_etag(hashlib.md5(
+            ':'.join(str(part) for part in (*version, *viewer)).encode()
+        ).hexdigest())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -9,3 +9,7 @@ MAX_URL_LENGTH = 6
 
 MAX_AMOUNT_COOK_TIME = 32000
 MIN_AMOUNT_COOK_TIME = 1
+
+MAX_BULK_ITEMS = 100
+
+COOKING_TIME_FACETS = ((1, 15), (15, 30), (30, 60), (60, None))
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Recipe, RecipeDocument, RecipeIngredient, Tag
+
+USER_COLUMNS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+documents_rebuilt = Signal()
+
+
+def recipe_tags(recipe_ids):
+    tags = defaultdict(list)
+    for tag in Tag.objects.filter(recipes__in=recipe_ids).values(
+        'id', 'name', 'slug', recipe_id=F('recipes')
+    ):
+        tags[tag.pop('recipe_id')].append(tag)
+    return tags
+
+
+def recipe_ingredients(recipe_ids):
+    ingredients = defaultdict(list)
+    for item in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values(
+        'recipe_id', 'ingredient_id', 'amount',
+        name=F('ingredient__name'),
+        unit_name=F('ingredient__measurement_unit__name'),
+    ):
+        ingredients[item['recipe_id']].append({
+            'id': item['ingredient_id'],
+            'name': item['name'],
+            'measurement_unit': item['unit_name'],
+            'amount': item['amount'],
+        })
+    return ingredients
+
+
+def render_documents(recipe_ids):
+    """
+    Документы рецептов без полей, зависящих от пользователя.
+    Вместо URL изображений хранятся имена файлов.
+    """
+    recipe_ids = list(recipe_ids)
+    tags = recipe_tags(recipe_ids)
+    ingredients = recipe_ingredients(recipe_ids)
+    documents = {}
+    for row in Recipe.all_objects.filter(pk__in=recipe_ids).values(
+        'id', 'name', 'image', 'text', 'cooking_time', 'pub_date',
+        'author_id', *(f'author__{name}' for name in USER_COLUMNS),
+        'author__avatar'
+    ):
+        recipe_tags_list = tags.get(row['id'], [])
+        documents[row['id']] = RecipeDocument(
+            recipe_id=row['id'],
+            author_id=row['author_id'],
+            tag_ids=[tag['id'] for tag in recipe_tags_list],
+            pub_date=row['pub_date'],
+            cooking_time=row['cooking_time'],
+            data={
+                'id': row['id'],
+                'tags': recipe_tags_list,
+                'author': {
+                    name: row[f'author__{name}']
+                    for name in (*USER_COLUMNS, 'avatar')
+                },
+                'ingredients': ingredients.get(row['id'], []),
+                'name': row['name'],
+                'image': row['image'],
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+            },
+        )
+    return documents
+
+
+@transaction.atomic
+def rebuild_documents(recipe_ids):
+    """
+    Перестраивает документы рецептов и обновляет их updated_at,
+    чтобы сменились ETag списков и страниц рецептов.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return 0
+    documents = render_documents(recipe_ids)
+    RecipeDocument.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeDocument.objects.bulk_create(documents.values())
+    Recipe.all_objects.filter(pk__in=recipe_ids).update(
+        updated_at=timezone.now())
+    documents_rebuilt.send(sender=RecipeDocument, recipe_ids=recipe_ids)
+    return len(documents)
@@ -0,0 +1,19 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(request, available):
+    """Поля ответа с учётом параметров ?fields= и ?omit= запроса."""
+    selected = set(available)
+    if request is None or request.method not in SAFE_METHODS:
+        return selected
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit')
+    if fields:
+        selected &= _split(fields)
+    if omit:
+        selected -= _split(omit)
+    return selected
@@ -1,40 +1,83 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from django_filters.rest_framework import (
+    BaseInFilter,
     BooleanFilter,
     CharFilter,
+    ChoiceFilter,
     FilterSet,
-    ModelMultipleChoiceFilter,
+    MultipleChoiceFilter,
+    NumberFilter,
 )
+from rest_framework.exceptions import ValidationError
 
-from .models import Ingredient, Recipe, Tag
+from .cache import get_tag_choices, get_tag_ids_by_slug
+from .constants import MAX_BULK_ITEMS
+from .models import Ingredient, Recipe
 
 User = get_user_model()
 
 
+class NumberInFilter(BaseInFilter, NumberFilter):
+    pass
+
+
 class IngredientFilter(FilterSet):
-    name = CharFilter(field_name='name', lookup_expr='startswith')
+    name = CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ['name']
 
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(name__startswith=value).order_by(
+            '-usage_count', 'name')
+
 
 class RecipeFilter(FilterSet):
-    tags = ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug',
-        conjoined=False,
+    tags = MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags',
         label='Tags'
     )
+    tags_match = ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')),
+        method='filter_tags_match',
+        label='Tags match'
+    )
 
+    cooking_time_min = NumberFilter(
+        field_name='cooking_time', lookup_expr='gte')
+    cooking_time_max = NumberFilter(
+        field_name='cooking_time', lookup_expr='lte')
     is_favorited = BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = BooleanFilter(method='filter_is_in_shopping_cart')
+    ids = NumberInFilter(method='filter_ids')
 
     class Meta:
         model = Recipe
         fields = ['author', 'tags']
 
+    def filter_tags(self, queryset, name, value):
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        tag_ids = {tag_ids_by_slug[slug] for slug in value}
+        recipe_tags = Recipe.tags.through.objects.filter(tag_id__in=tag_ids)
+        if self.form.cleaned_data.get('tags_match') == 'all':
+            return queryset.filter(pk__in=recipe_tags.values(
+                'recipe_id').annotate(
+                    matched=Count('tag_id')).filter(
+                        matched=len(tag_ids)).values('recipe_id'))
+        return queryset.filter(pk__in=recipe_tags.values('recipe_id'))
+
+    def filter_tags_match(self, queryset, name, value):
+        return queryset
+
+    def filter_ids(self, queryset, name, value):
+        if len(value) > MAX_BULK_ITEMS:
+            raise ValidationError(
+                {'ids': f'Не больше {MAX_BULK_ITEMS} идентификаторов.'})
+        return queryset.filter(pk__in=value)
+
     def filter_is_favorited(self, queryset, name, value):
         if not self.request.user.is_authenticated:
             return queryset.none()
@@ -1,4 +1,5 @@
 from django import forms
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.forms import BaseInlineFormSet, inlineformset_factory
 
 from .models import Recipe, RecipeIngredient
@@ -9,12 +10,49 @@ class RecipeForm(forms.ModelForm):
         model = Recipe
         fields = '__all__'
 
+    def clean_name(self):
+        name = self.cleaned_data['name']
+        if Recipe.objects.filter(name=name).exclude(
+                pk=self.instance.pk).exists():
+            raise forms.ValidationError(
+                'Рецепт с таким названием уже существует.')
+        return name
+
     def clean(self):
         cleaned_data = super().clean()
         return cleaned_data
 
 
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """
+    Автодополнение, которое берёт выбранный объект из instance, а не
+    загружает его отдельным запросом.
+    """
+
+    instance = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(item) for item in value if item not in (None, '')]
+        if self.instance is None or selected != [str(self.instance.pk)]:
+            return super().optgroups(name, value, attr)
+        return [(None, [self.create_option(
+            name, self.instance.pk,
+            self.choices.field.label_from_instance(self.instance), True, 0
+        )], 0)]
+
+
 class RecipeIngredientInlineFormSet(BaseInlineFormSet):
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        # Без этого виджет каждой строки делает свой запрос ингредиента.
+        widget = getattr(form.fields['ingredient'].widget, 'widget', None)
+        if (
+            isinstance(widget, PreloadedAutocompleteSelect)
+            and form.instance.ingredient_id
+        ):
+            widget.instance = form.instance.ingredient
+        return form
+
     def clean(self):
         super().clean()
         if any(self.errors):
@@ -0,0 +1,79 @@
+import json
+import os
+import random
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.cache import get_generation
+from recipes.search import INDEX_GENERATION_CACHE_KEY, TrigramIndex
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the in-memory ingredient search on synthetic indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[2000, 10000, 100000],
+            help='Numbers of ingredients in the synthetic indexes',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Number of queries per index',
+        )
+
+    def _base_names(self):
+        path = os.path.join(settings.BASE_DIR, 'data/', 'ingredients.json')
+        with open(path, 'r', encoding='utf-8') as file:
+            return [entry['name'] for entry in json.load(file)]
+
+    def _names(self, base, size):
+        names = base[:size]
+        words = [word for name in base for word in name.split()]
+        while len(names) < size:
+            names.append(f'{random.choice(base)} {random.choice(words)}')
+        return names
+
+    def _query(self, names):
+        name = random.choice(names)
+        if random.random() < 0.5:
+            return name[:random.randint(1, len(name))]
+        position = random.randrange(len(name))
+        return name[:position] + random.choice('аеиоу') + name[position + 1:]
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        base = self._base_names()
+        generation = get_generation(INDEX_GENERATION_CACHE_KEY)
+        self.stdout.write(
+            f'{"ingredients":>12}{"build ms":>10}{"p50 ms":>9}'
+            f'{"p95 ms":>9}{"max ms":>9}'
+        )
+        for size in options['sizes']:
+            names = self._names(base, size)
+            index = TrigramIndex()
+            start = time.perf_counter()
+            index.load(
+                ((pk, name, None, None) for pk, name in enumerate(names, 1)),
+                generation
+            )
+            build = (time.perf_counter() - start) * 1000
+            timings = []
+            for _ in range(options['queries']):
+                query = self._query(names)
+                start = time.perf_counter()
+                index.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{size:>12}{build:>10.0f}'
+                f'{statistics.median(timings):>9.2f}'
+                f'{timings[int(len(timings) * 0.95)]:>9.2f}'
+                f'{timings[-1]:>9.2f}'
+            )
@@ -0,0 +1,114 @@
+import time
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.projections import FollowProjection, RecipeProjection, UserProjection
+from api.serializers import FollowSerializer, RecipeSerializer, UserSerializer
+from api.views import RecipeViewSet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer and values() projections on list data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--objects',
+            type=int,
+            default=1000,
+            help='Maximum number of objects per list',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5,
+            help='Number of runs per case',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the user making requests, anonymous by default',
+        )
+
+    def _request(self, path, email):
+        request = Request(APIRequestFactory().get(path))
+        request.user = AnonymousUser()
+        if email:
+            request.user = User.objects.filter(email=email).first()
+            if request.user is None:
+                raise CommandError('User not found')
+        return request
+
+    def _measure(self, func, iterations):
+        start = time.process_time()
+        for _ in range(iterations):
+            data = func()
+        return data, (time.process_time() - start) / iterations * 1000
+
+    def handle(self, *args, **options):
+        objects = options['objects']
+        iterations = options['iterations']
+        email = options['user']
+
+        recipe_request = self._request('/api/recipes/', email)
+        view = RecipeViewSet(
+            request=recipe_request, action='list', kwargs={},
+            format_kwarg=None
+        )
+        recipes = view.get_queryset()[:objects]
+        users = User.objects.filter(
+            deleted_at__isnull=True).order_by('pk')[:objects]
+        user_request = self._request('/api/users/', email)
+        follow_request = self._request('/api/users/subscriptions/', email)
+
+        cases = [
+            (
+                'recipes',
+                lambda: RecipeSerializer(
+                    recipes.all(), many=True,
+                    context={'request': recipe_request, 'view': view}
+                ).data,
+                lambda: RecipeProjection(recipe_request).project(
+                    list(RecipeProjection(recipe_request).values(recipes))),
+            ),
+            (
+                'users',
+                lambda: UserSerializer(
+                    users.all(), many=True,
+                    context={'request': user_request}
+                ).data,
+                lambda: UserProjection(user_request).project(
+                    list(UserProjection(user_request).values(users))),
+            ),
+            (
+                'subscriptions',
+                lambda: FollowSerializer(
+                    users.prefetch_related('recipes'), many=True,
+                    context={'request': follow_request}
+                ).data,
+                lambda: FollowProjection(follow_request).project(
+                    list(FollowProjection(follow_request).values(users))),
+            ),
+        ]
+
+        self.stdout.write(
+            f'{iterations} iterations, cpu ms per 1000 objects\n'
+            f'{"list":<16}{"objects":>9}{"serializer":>12}'
+            f'{"projection":>12}{"speedup":>9}'
+        )
+        for name, serialize, project in cases:
+            data, serializer_cpu = self._measure(serialize, iterations)
+            _, projection_cpu = self._measure(project, iterations)
+            if not data:
+                self.stdout.write(f'{name:<16}{0:>9}')
+                continue
+            scale = 1000 / len(data)
+            self.stdout.write(
+                f'{name:<16}{len(data):>9}'
+                f'{serializer_cpu * scale:>12.1f}'
+                f'{projection_cpu * scale:>12.1f}'
+                f'{serializer_cpu / projection_cpu:>8.1f}x'
+            )
@@ -0,0 +1,74 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.views import RecipeViewSet
+from recipes.pagination import PageLimitPaginator
+from recipes.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = 'Compare size and CPU time of renderers on a /api/recipes/ page'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of renders per renderer',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=PageLimitPaginator.max_page_size,
+            help='Page size of the rendered recipe list',
+        )
+
+    def _measure(self, func, iterations):
+        start = time.process_time()
+        for _ in range(iterations):
+            result = func()
+        return result, (time.process_time() - start) / iterations * 10**6
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        request = APIRequestFactory().get(
+            '/api/recipes/', {'limit': options['limit']})
+        data = RecipeViewSet.as_view({'get': 'list'})(request).data
+
+        renderers = [JSONRenderer(), ORJSONRenderer()]
+        if msgpack:
+            renderers.append(MessagePackRenderer())
+
+        self.stdout.write(
+            f'{len(data["results"])} recipes, {iterations} iterations\n'
+            f'{"renderer":<22}{"bytes":>9}{"cpu, us":>10}'
+            f'{"gzip":>9}{"cpu, us":>10}{"br":>9}{"cpu, us":>10}'
+        )
+        for renderer in renderers:
+            content, render_cpu = self._measure(
+                lambda: renderer.render(data, renderer.media_type),
+                iterations
+            )
+            gzipped, gzip_cpu = self._measure(
+                lambda: compress_string(content), iterations)
+            line = (
+                f'{type(renderer).__name__:<22}{len(content):>9}'
+                f'{render_cpu:>10.1f}{len(gzipped):>9}{gzip_cpu:>10.1f}'
+            )
+            if brotli:
+                compressed, brotli_cpu = self._measure(
+                    lambda: brotli.compress(
+                        content, quality=settings.BROTLI_QUALITY),
+                    iterations
+                )
+                line += f'{len(compressed):>9}{brotli_cpu:>10.1f}'
+            self.stdout.write(line)
@@ -0,0 +1,113 @@
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.http import QueryDict
+
+from recipes.cache import invalidate_tags
+from recipes.filters import RecipeFilter
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark RecipeFilter tag filtering against the old M2M join'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Create N synthetic recipes inside a rolled back transaction',
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=20,
+            help='Number of synthetic tags used with --seed',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Number of runs per query',
+        )
+
+    def _seed(self, recipes_count, tags_count):
+        author = User.objects.create(
+            username='benchmark-author', email='benchmark@example.com')
+        Tag.objects.bulk_create([
+            Tag(name=f'benchmark-{index}', slug=f'benchmark-{index}')
+            for index in range(tags_count)
+        ])
+        Recipe.objects.bulk_create([
+            Recipe(
+                author=author,
+                name=f'benchmark-{index}',
+                text='benchmark',
+                cooking_time=random.randint(1, 180),
+                short_id=f'b{index}'
+            )
+            for index in range(recipes_count)
+        ], batch_size=5000)
+        tag_ids = list(Tag.objects.filter(
+            slug__startswith='benchmark-').values_list('pk', flat=True))
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in Recipe.objects.filter(
+                author=author).values_list('pk', flat=True).iterator()
+            for tag_id in random.sample(tag_ids, random.randint(1, 3))
+        ], batch_size=5000)
+        invalidate_tags()
+
+    def _time(self, queryset, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            ids = list(queryset.values_list('pk', flat=True)[:10])
+            count = queryset.count()
+        elapsed = (time.perf_counter() - start) / iterations * 1000
+        return count, len(ids), elapsed
+
+    def _run(self, iterations):
+        slugs = list(Tag.objects.annotate(
+            recipes_count=Count('recipes')
+        ).order_by('-recipes_count').values_list('slug', flat=True)[:3])
+        queryset = Recipe.objects.all()
+        cases = [
+            ('old join, any', queryset.filter(tags__slug__in=slugs)),
+        ]
+        for match in ('any', 'all'):
+            params = QueryDict(mutable=True)
+            params.setlist('tags', slugs)
+            params['tags_match'] = match
+            recipe_filter = RecipeFilter(params, queryset=queryset)
+            if not recipe_filter.is_valid():
+                self.stdout.write(self.style.ERROR(
+                    f'Invalid filter: {recipe_filter.errors}'))
+                return
+            cases.append((f'filter, {match}', recipe_filter.qs))
+
+        self.stdout.write(
+            f'{Recipe.objects.count()} recipes, tags: {", ".join(slugs)}')
+        for name, case in cases:
+            count, _, elapsed = self._time(case, iterations)
+            self.stdout.write(f'{name:<16} rows={count:<8} {elapsed:.2f} ms')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self._seed(options['seed'], options['tags'])
+                self._run(options['iterations'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            invalidate_tags()
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
 
+from recipes.cache import invalidate_counts
+
 User = get_user_model()
 
 
@@ -36,18 +39,25 @@ class Command(BaseCommand):
             }
         ]
 
+        existing = set(User.objects.filter(
+            username__in=[user_data['username'] for user_data in users_data]
+        ).values_list('username', flat=True))
+        users = []
         for user_data in users_data:
-            if User.objects.filter(username=user_data['username']).exists():
+            if user_data['username'] in existing:
                 self.stdout.write(self.style.WARNING(
                     f'User with username {user_data["username"]} already '
                     f'exists.'))
-            else:
-                User.objects.create_user(
-                    username=user_data['username'],
-                    email=user_data['email'],
-                    password=user_data['password'],
-                    first_name=user_data['first_name'],
-                    last_name=user_data['last_name']
-                )
-                self.stdout.write(self.style.SUCCESS(
-                    f'User {user_data["username"]} created successfully.'))
+                continue
+            users.append(User(
+                username=user_data['username'],
+                email=user_data['email'],
+                password=make_password(user_data['password']),
+                first_name=user_data['first_name'],
+                last_name=user_data['last_name']
+            ))
+        User.objects.bulk_create(users)
+        invalidate_counts(User)
+        for user in users:
+            self.stdout.write(self.style.SUCCESS(
+                f'User {user.username} created successfully.'))
@@ -0,0 +1,89 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.storage import is_recent, referenced_media, referenced_names
+
+
+class Command(BaseCommand):
+    help = 'Delete media files that are not referenced by any object'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report orphaned files',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of files deleted per batch',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=settings.MEDIA_ORPHAN_MIN_AGE,
+            help='Skip files modified less than N seconds ago',
+        )
+
+    def _scan(self, root, skip):
+        directories = [root]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in skip:
+                            directories.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+    def _delete(self, batch, min_age):
+        # Ссылки и время изменения проверяются ещё раз прямо перед
+        # удалением: с начала обхода файл могли загрузить повторно.
+        referenced = referenced_names(name for _, name in batch)
+        deleted = 0
+        for path, name in batch:
+            if name in referenced or is_recent(path, min_age):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            deleted += 1
+        return deleted
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(settings.MEDIA_ROOT)
+        skip = {os.path.abspath(settings.STATIC_PAGES_ROOT)}
+        referenced = set(referenced_media())
+        threshold = time.time() - options['min_age']
+        orphans = orphan_bytes = scanned = deleted = 0
+        batch = []
+
+        for entry in self._scan(root, skip):
+            scanned += 1
+            name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+            stat = entry.stat(follow_symlinks=False)
+            if name in referenced or stat.st_mtime > threshold:
+                continue
+            orphans += 1
+            orphan_bytes += stat.st_size
+            if options['dry_run']:
+                self.stdout.write(name)
+                continue
+            batch.append((entry.path, name))
+            if len(batch) >= options['batch_size']:
+                deleted += self._delete(batch, options['min_age'])
+                batch = []
+        if batch:
+            deleted += self._delete(batch, options['min_age'])
+
+        message = (
+            f'Scanned {scanned} files, referenced {len(referenced)}. '
+            f'Found {orphans} orphaned files ({orphan_bytes} bytes)'
+        )
+        if not options['dry_run']:
+            message += f', deleted {deleted}'
+        self.stdout.write(self.style.SUCCESS(message))
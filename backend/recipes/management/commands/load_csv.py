@@ -4,7 +4,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import IntegrityError
 
-from recipes.models import Ingredient
+from recipes.models import Ingredient, MeasurementUnit
 
 
 class Command(BaseCommand):
@@ -26,6 +26,7 @@ class Command(BaseCommand):
                 self.style.ERROR(f'File "{filename}" does not exist'))
             return
 
+        units = {}
         with open(path, 'r', encoding='utf-8') as file:
             reader = csv.reader(file)
             for row in reader:
@@ -37,10 +38,15 @@ class Command(BaseCommand):
                 ingredient_name = row[0].strip()
                 measurement_unit = row[1].strip()
 
+                if measurement_unit not in units:
+                    units[measurement_unit] = (
+                        MeasurementUnit.objects.get_or_create(
+                            name=measurement_unit)[0])
+
                 try:
                     Ingredient.objects.get_or_create(
                         name=ingredient_name,
-                        measurement_unit=measurement_unit
+                        measurement_unit=units[measurement_unit]
                     )
                 except IntegrityError as error:
                     self.stdout.write(self.style.ERROR(
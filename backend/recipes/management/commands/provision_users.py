@@ -0,0 +1,114 @@
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+
+from recipes.cache import invalidate_counts
+
+User = get_user_model()
+
+COLUMNS = ('email', 'username', 'first_name', 'last_name', 'password')
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users from a CSV file with email, username, first_name, '
+        'last_name and password columns'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'filename',
+            type=str,
+            help='The name of the CSV file to import',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of processes hashing passwords',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of users per INSERT',
+        )
+
+    def _read(self, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            missing = set(COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(
+                    f'Missing columns: {", ".join(sorted(missing))}')
+            return [
+                {name: row[name].strip() for name in COLUMNS}
+                for row in reader
+            ]
+
+    def _existing(self, rows):
+        emails = {row['email'] for row in rows}
+        usernames = {row['username'] for row in rows}
+        existing = User.objects.filter(
+            Q(email__in=emails) | Q(username__in=usernames)
+        ).values_list('email', 'username')
+        return (
+            {email for email, _ in existing},
+            {username for _, username in existing},
+        )
+
+    def _hash(self, passwords, processes):
+        # Хэширование занимает почти всё время импорта и упирается
+        # в процессор, поэтому выполняется в отдельных процессах.
+        if processes <= 1 or len(passwords) < 2:
+            return [make_password(password) for password in passwords]
+        connections.close_all()
+        with ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            return list(executor.map(
+                make_password, passwords,
+                chunksize=max(1, len(passwords) // (processes * 4))
+            ))
+
+    def handle(self, *args, **options):
+        filename = options['filename']
+        path = os.path.join(settings.BASE_DIR, 'data/', filename)
+
+        if not os.path.exists(path):
+            raise CommandError(f'File "{filename}" does not exist')
+
+        rows = self._read(path)
+        emails, usernames = self._existing(rows)
+        users = []
+        for row in rows:
+            if row['email'] in emails or row['username'] in usernames:
+                self.stdout.write(self.style.WARNING(
+                    f'User {row["username"]} ({row["email"]}) already '
+                    f'exists.'))
+                continue
+            emails.add(row['email'])
+            usernames.add(row['username'])
+            users.append(row)
+
+        passwords = self._hash(
+            [user.pop('password') for user in users], options['processes'])
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(password=password, **user)
+                    for user, password in zip(users, passwords)
+                ],
+                batch_size=options['batch_size'],
+            )
+        invalidate_counts(User)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users from "{filename}"'))
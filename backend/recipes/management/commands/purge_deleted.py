@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.purge import purge_recipes, purge_users
+
+
+class Command(BaseCommand):
+    help = 'Permanently delete soft-deleted recipes and users in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Maximum rows deleted per statement',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.05,
+            help='Seconds to sleep between batches',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pause = options['pause']
+        recipes = purge_recipes(batch_size, pause)
+        users = purge_users(batch_size, pause)
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {recipes} recipes and {users} users'))
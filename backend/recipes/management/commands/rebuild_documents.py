@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from recipes.documents import rebuild_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Rebuild RecipeDocument read models for all recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of recipes rebuilt per transaction',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        rebuilt = 0
+        for start in range(0, len(ids), batch_size):
+            rebuilt += rebuild_documents(ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rebuilt} recipe documents'))
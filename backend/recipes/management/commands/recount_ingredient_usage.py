@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Ingredient
+from recipes.usage import refresh_usage
+
+
+class Command(BaseCommand):
+    help = 'Recount the number of recipes using each ingredient'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of ingredients recounted per UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(
+            Ingredient.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            refresh_usage(ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted usage of {len(ids)} ingredients'))
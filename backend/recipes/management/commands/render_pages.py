@@ -0,0 +1,40 @@
+import os
+import shutil
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.pages import write_pages, write_sitemap
+
+
+class Command(BaseCommand):
+    help = 'Render static recipe pages and the sitemap'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of recipes rendered per batch',
+        )
+        parser.add_argument(
+            '--clean',
+            action='store_true',
+            help='Remove all previously rendered pages first',
+        )
+
+    def handle(self, *args, **options):
+        if options['clean']:
+            for directory in ('recipes', 's'):
+                shutil.rmtree(
+                    os.path.join(settings.STATIC_PAGES_ROOT, directory),
+                    ignore_errors=True
+                )
+        batch_size = options['batch_size']
+        ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        rendered = 0
+        for start in range(0, len(ids), batch_size):
+            rendered += write_pages(ids[start:start + batch_size])
+        parts = write_sitemap()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} pages and {parts} sitemap files'))
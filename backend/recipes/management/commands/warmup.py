@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Warm up caches, URL resolvers, views and the ingredient index'
+
+    def handle(self, *args, **options):
+        timings = warm_up()
+        for stage, elapsed in timings.items():
+            self.stdout.write(f'{stage:<16} {elapsed:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Warm-up completed in {sum(timings.values()):.1f} ms'))
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.3 on 2026-10-19 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_cooking_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementUnit',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='Название')),
+                ('factor', models.PositiveIntegerField(default=1, verbose_name='Количество базовых единиц')),
+                ('base_unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='derived_units', to='recipes.measurementunit', verbose_name='Базовая единица')),
+            ],
+            options={
+                'verbose_name': 'Единица измерения',
+                'verbose_name_plural': 'Единицы измерения',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RenameField(
+            model_name='ingredient',
+            old_name='measurement_unit',
+            new_name='measurement_unit_name',
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='measurement_unit_name',
+            field=models.CharField(max_length=64, null=True, verbose_name='Единица измерения'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='measurement_unit',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ingredients', to='recipes.measurementunit', verbose_name='Единица измерения'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.3 on 2026-10-19 13:00
+
+from django.db import migrations
+
+UNIT_CONVERSIONS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+}
+
+
+def normalize_units(apps, schema_editor):
+    MeasurementUnit = apps.get_model('recipes', 'MeasurementUnit')
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+
+    raw_names = set(Ingredient.objects.values_list(
+        'measurement_unit_name', flat=True))
+    names = {name.strip() for name in raw_names}
+    names.update(base for base, _ in UNIT_CONVERSIONS.values())
+    units = {
+        name: MeasurementUnit.objects.create(name=name)
+        for name in sorted(names)
+    }
+    for name, (base, factor) in UNIT_CONVERSIONS.items():
+        if name in units:
+            units[name].base_unit = units[base]
+            units[name].factor = factor
+            units[name].save()
+
+    for raw_name in raw_names:
+        Ingredient.objects.filter(measurement_unit_name=raw_name).update(
+            measurement_unit=units[raw_name.strip()])
+
+
+def denormalize_units(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    for ingredient in Ingredient.objects.select_related('measurement_unit'):
+        ingredient.measurement_unit_name = ingredient.measurement_unit.name
+        ingredient.save(update_fields=['measurement_unit_name'])
+
+
+# Данные переносятся отдельной миграцией: в PostgreSQL внешние ключи
+# проверяются отложенно, и ALTER TABLE в одной транзакции с UPDATE
+# падает с "pending trigger events".
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_measurementunit'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_units, denormalize_units),
+    ]
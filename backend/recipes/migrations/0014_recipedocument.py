@@ -0,0 +1,32 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0013_recipe_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeDocument',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('tag_ids', models.JSONField(default=list, verbose_name='Тэги рецепта')),
+                ('pub_date', models.DateTimeField(db_index=True, verbose_name='Дата публикации')),
+                ('cooking_time', models.PositiveSmallIntegerField(verbose_name='Время приготовления рецепта')),
+                ('data', models.JSONField(verbose_name='Представление рецепта')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_documents', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта')),
+            ],
+            options={
+                'verbose_name': 'Документ рецепта',
+                'verbose_name_plural': 'Документы рецептов',
+                'ordering': ['-pub_date'],
+            },
+        ),
+    ]
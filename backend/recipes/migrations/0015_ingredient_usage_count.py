@@ -0,0 +1,35 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:34
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_usage(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    Ingredient.objects.update(usage_count=Coalesce(Subquery(
+        RecipeIngredient.objects.filter(
+            ingredient=OuterRef('pk'), recipe__deleted_at__isnull=True
+        ).values('ingredient').annotate(total=Count('pk')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipedocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='usage_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число рецептов'),
+        ),
+        migrations.RunPython(count_usage, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['-usage_count', 'name'], name='ingredient_usage_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ import shortuuid
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from .constants import (
     MAX_AMOUNT_COOK_TIME,
@@ -40,25 +41,73 @@ class Tag(models.Model):
         return self.name
 
 
+class MeasurementUnit(models.Model):
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(
+        max_length=MAX_MEASUREMENT_LENGTH,
+        unique=True,
+        verbose_name='Название',
+    )
+    base_unit = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name='derived_units',
+        verbose_name='Базовая единица',
+    )
+    factor = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Количество базовых единиц',
+    )
+
+    class Meta:
+        verbose_name = 'Единица измерения'
+        verbose_name_plural = 'Единицы измерения'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class Ingredient(models.Model):
     name = models.CharField(
         max_length=MAX_INGREDIENT_LENGTH,
         verbose_name='Название ингридиента',
     )
-    measurement_unit = models.CharField(
-        max_length=MAX_MEASUREMENT_LENGTH,
+    measurement_unit = models.ForeignKey(
+        MeasurementUnit,
+        on_delete=models.PROTECT,
+        related_name='ingredients',
         verbose_name='Единица измерения',
     )
+    usage_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число рецептов',
+    )
 
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ['name']
+        indexes = [
+            models.Index(
+                fields=['-usage_count', 'name'],
+                name='ingredient_usage_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeManager(models.Manager):
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -68,7 +117,6 @@ class Recipe(models.Model):
     )
     name = models.CharField(
         max_length=MAX_LENGTH,
-        unique=True,
         verbose_name='Название рецепта',
     )
     image = models.ImageField(
@@ -110,6 +158,10 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
     short_id = models.CharField(
         max_length=MAX_ID_LENGTH,
         unique=True,
@@ -117,15 +169,42 @@ class Recipe(models.Model):
         editable=False,
         verbose_name='Короткий идентификатор'
     )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Дата удаления'
+    )
+
+    objects = RecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['cooking_time'],
+                name='recipe_cooking_time_idx'
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='unique_recipe_name'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at', 'updated_at'])
+
     def save(self, *args, **kwargs):
         if not self.short_id:
             self.short_id = shortuuid.ShortUUID().random(length=MAX_URL_LENGTH)
@@ -191,6 +270,12 @@ class Favorite(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_favorite'
+            )
+        ]
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         ordering = ['user']
@@ -214,9 +299,55 @@ class ShoppingList(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_shopping_list'
+            )
+        ]
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
         ordering = ['user']
 
     def __str__(self):
         return self.user.username
+
+
+class RecipeDocument(models.Model):
+    """Готовое представление рецепта для чтения без соединений таблиц."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recipe_documents',
+        verbose_name='Автор рецепта'
+    )
+    tag_ids = models.JSONField(
+        default=list,
+        verbose_name='Тэги рецепта'
+    )
+    pub_date = models.DateTimeField(
+        db_index=True,
+        verbose_name='Дата публикации'
+    )
+    cooking_time = models.PositiveSmallIntegerField(
+        verbose_name='Время приготовления рецепта'
+    )
+    data = models.JSONField(
+        verbose_name='Представление рецепта'
+    )
+
+    class Meta:
+        verbose_name = 'Документ рецепта'
+        verbose_name_plural = 'Документы рецептов'
+        ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.data.get('name', str(self.recipe_id))
@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from .documents import render_documents
+from .models import Recipe, RecipeDocument
+
+SITEMAP_MAX_URLS = 50000
+
+
+def page_url(recipe_id):
+    return f'{settings.STATIC_PAGES_URL}recipes/{recipe_id}/'
+
+
+def page_dir(recipe_id):
+    return os.path.join(settings.STATIC_PAGES_ROOT, 'recipes', str(recipe_id))
+
+
+def short_link_path(short_id):
+    return os.path.join(settings.STATIC_PAGES_ROOT, 's', short_id)
+
+
+def page_exists(recipe_id):
+    return os.path.exists(os.path.join(page_dir(recipe_id), 'index.html'))
+
+
+def _write(path, content):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=directory, delete=False
+    ) as file:
+        file.write(content)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def _link_short_id(recipe_id, short_id):
+    """Ссылка s/<short_id> на страницу рецепта, её отдаёт nginx."""
+    path = short_link_path(short_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    if os.path.lexists(temporary):
+        os.remove(temporary)
+    os.symlink(os.path.join('..', 'recipes', str(recipe_id)), temporary)
+    os.replace(temporary, path)
+
+
+def delete_pages(recipes):
+    """Удаляет страницы рецептов, переданных парами (id, short_id)."""
+    for recipe_id, short_id in recipes:
+        if short_id and os.path.lexists(short_link_path(short_id)):
+            os.remove(short_link_path(short_id))
+        shutil.rmtree(page_dir(recipe_id), ignore_errors=True)
+
+
+def write_pages(recipe_ids):
+    """
+    Рендерит страницы рецептов в STATIC_PAGES_ROOT. Страницы удалённых
+    рецептов стираются.
+    """
+    recipe_ids = set(recipe_ids)
+    recipes = {
+        row['id']: row for row in Recipe.all_objects.filter(
+            pk__in=recipe_ids
+        ).values('id', 'short_id', 'deleted_at', 'document__data')
+    }
+    delete_pages(
+        (recipe_id, recipes.get(recipe_id, {}).get('short_id'))
+        for recipe_id in recipe_ids
+        if recipes.get(recipe_id, {}).get('deleted_at') is not None
+        or recipe_id not in recipes
+    )
+    live = {
+        recipe_id: row for recipe_id, row in recipes.items()
+        if row['deleted_at'] is None
+    }
+    missing = [
+        recipe_id for recipe_id, row in live.items()
+        if row['document__data'] is None
+    ]
+    rendered = render_documents(missing) if missing else {}
+    image = Recipe._meta.get_field('image').storage
+    for recipe_id, row in live.items():
+        document = row['document__data'] or rendered[recipe_id].data
+        _write(
+            os.path.join(page_dir(recipe_id), 'index.html'),
+            render_to_string('recipes/static_page.html', {
+                'recipe': document,
+                # Open Graph требует абсолютный URL изображения.
+                'image_url': (
+                    urljoin(
+                        f'{settings.SITE_URL}/', image.url(document['image']))
+                    if document['image'] else None
+                ),
+                'app_url': f'/recipes/{recipe_id}/',
+                'page_url': f'{settings.SITE_URL}{page_url(recipe_id)}',
+            })
+        )
+        if row['short_id']:
+            _link_short_id(recipe_id, row['short_id'])
+    return len(live)
+
+
+def _urlset(rows):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for recipe_id, updated_at in rows:
+        lines.append(
+            f'<url><loc>{escape(settings.SITE_URL + page_url(recipe_id))}'
+            f'</loc><lastmod>{updated_at.date().isoformat()}</lastmod></url>'
+        )
+    lines.append('</urlset>')
+    return '\n'.join(lines)
+
+
+def write_sitemap():
+    """
+    Пишет sitemap.xml как индекс файлов sitemap-N.xml по SITEMAP_MAX_URLS
+    рецептов в каждом.
+    """
+    queryset = RecipeDocument.objects.filter(
+        recipe__deleted_at__isnull=True
+    ).order_by('recipe_id').values_list('recipe_id', 'recipe__updated_at')
+    parts = 0
+    chunk = []
+    for row in queryset.iterator():
+        chunk.append(row)
+        if len(chunk) == SITEMAP_MAX_URLS:
+            parts += 1
+            _write(os.path.join(
+                settings.STATIC_PAGES_ROOT, f'sitemap-{parts}.xml'
+            ), _urlset(chunk))
+            chunk = []
+    if chunk or not parts:
+        parts += 1
+        _write(os.path.join(
+            settings.STATIC_PAGES_ROOT, f'sitemap-{parts}.xml'
+        ), _urlset(chunk))
+
+    base = f'{settings.SITE_URL}{settings.STATIC_PAGES_URL}'
+    _write(os.path.join(settings.STATIC_PAGES_ROOT, 'sitemap.xml'), '\n'.join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<sitemapindex '
+        'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+        *(
+            f'<sitemap><loc>{escape(base)}sitemap-{part}.xml</loc></sitemap>'
+            for part in range(1, parts + 1)
+        ),
+        '</sitemapindex>',
+    ]))
+    return parts
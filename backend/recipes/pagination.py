@@ -1,7 +1,129 @@
+import json
+from collections import OrderedDict
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import get_cached_count
+from .conditional import viewer_version
+
+COUNT_EXACT = 'exact'
+COUNT_CACHED = 'cached'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+
+# Параметры, не меняющие набор объектов в выдаче.
+NON_FILTER_PARAMS = {'page', 'limit', 'fields', 'omit', 'format'}
+
+
+class CountedPaginator(Paginator):
+    """Paginator, получающий количество объектов от стратегии подсчёта."""
+
+    def __init__(self, object_list, per_page, count_function, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_function = count_function
+
+    @cached_property
+    def count(self):
+        return self.count_function()
+
+
+def estimated_count(queryset):
+    """Оценка планировщика PostgreSQL или None для других СУБД."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
 
 
 class PageLimitPaginator(PageNumberPagination):
+    """
+    Стратегия подсчёта задаётся атрибутом count_strategy представления:
+    exact — COUNT(*) на каждый запрос; cached — точное количество
+    из кэша по сигнатуре фильтров; estimate — оценка планировщика
+    для списков без фильтров больше COUNT_ESTIMATE_THRESHOLD, иначе
+    cached; none — ответ без count.
+    """
+
     page_size = 6
     page_size_query_param = 'limit'
     max_page_size = 10
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountedPaginator(
+            object_list, per_page, lambda: self.get_count(object_list))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.count_strategy = getattr(
+            view, 'count_strategy', settings.PAGINATION_COUNT_STRATEGY)
+        if self.count_strategy == COUNT_NONE:
+            return self.paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        if self.count_strategy == COUNT_EXACT:
+            return queryset.count()
+        filters = {
+            key: sorted(values)
+            for key, values in self.request.query_params.lists()
+            if key not in NON_FILTER_PARAMS
+        }
+        if self.count_strategy == COUNT_ESTIMATE and not filters:
+            estimate = estimated_count(queryset)
+            if (
+                estimate is not None
+                and estimate >= settings.COUNT_ESTIMATE_THRESHOLD
+            ):
+                return estimate
+        return get_cached_count(queryset, json.dumps([
+            type(self.view).__name__,
+            getattr(self.view, 'action', None),
+            sorted(filters.items()),
+            [str(part) for part in viewer_version(self.request)],
+        ]))
+
+    def paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params[self.page_query_param],
+                message='Invalid page.'))
+        if self.page_number < 1:
+            raise NotFound('Invalid page.')
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number > 1:
+            raise NotFound('Invalid page.')
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.count_strategy != COUNT_NONE:
+            return super().get_paginated_response(data)
+        url = self.request.build_absolute_uri()
+        next_url = (
+            replace_query_param(
+                url, self.page_query_param, self.page_number + 1)
+            if self.has_next else None
+        )
+        previous_url = None
+        if self.page_number == 2:
+            previous_url = remove_query_param(url, self.page_query_param)
+        elif self.page_number > 2:
+            previous_url = replace_query_param(
+                url, self.page_query_param, self.page_number - 1)
+        return Response(OrderedDict([
+            ('next', next_url),
+            ('previous', previous_url),
+            ('results', data),
+        ]))
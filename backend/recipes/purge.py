@@ -0,0 +1,125 @@
+import time
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .cache import invalidate_counts
+from .models import Recipe
+from .storage import delete_unreferenced
+from .usage import recipe_ingredient_ids, refresh_usage
+
+User = get_user_model()
+
+
+def _nullable(model):
+    """Модели и столбцы ссылок с SET_NULL, обнуляемые перед удалением."""
+    return [
+        (relation.related_model, relation.field.column)
+        for relation in model._meta.related_objects
+        if not relation.many_to_many
+        and relation.on_delete is models.SET_NULL
+    ]
+
+
+def _dependents(model, skip=()):
+    """Модели и столбцы, удаляемые каскадом вместе с объектами модели."""
+    dependents = [
+        (relation.related_model, relation.field.column)
+        for relation in model._meta.related_objects
+        if not relation.many_to_many
+        and relation.on_delete is models.CASCADE
+        and relation.related_model not in skip
+    ]
+    dependents += [
+        (field.remote_field.through, field.m2m_column_name())
+        for field in model._meta.many_to_many
+        if field.remote_field.through._meta.auto_created
+    ]
+    return dependents
+
+
+def _run_batches(model, column, ids, batch_size, pause, statement):
+    """
+    Выполняет statement ("DELETE FROM t" или "UPDATE t SET ...") для
+    строк со значением column из ids пачками по batch_size.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(ids))
+    sql = (
+        f'{statement.format(table=table)} WHERE {pk} IN ('
+        f'SELECT {pk} FROM {table} '
+        f'WHERE {quote(column)} IN ({placeholders}) LIMIT %s)'
+    )
+    affected = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [*ids, batch_size])
+            rowcount = cursor.rowcount
+        affected += rowcount
+        if rowcount < batch_size:
+            return affected
+        time.sleep(pause)
+
+
+def _delete_batches(model, column, ids, batch_size, pause):
+    return _run_batches(
+        model, column, ids, batch_size, pause, 'DELETE FROM {table}')
+
+
+def _nullify_batches(model, column, ids, batch_size, pause):
+    quoted = connection.ops.quote_name(column)
+    return _run_batches(
+        model, column, ids, batch_size, pause,
+        f'UPDATE {{table}} SET {quoted} = NULL'
+    )
+
+
+def _purge(model, queryset, file_field, batch_size, pause, skip=()):
+    nullable = _nullable(model)
+    dependents = _dependents(model, skip)
+    purged = 0
+    while True:
+        rows = list(queryset.values_list('pk', file_field)[:batch_size])
+        if not rows:
+            return purged
+        ids = [pk for pk, _ in rows]
+        for dependent, column in nullable:
+            _nullify_batches(dependent, column, ids, batch_size, pause)
+        for dependent, column in dependents:
+            _delete_batches(dependent, column, ids, batch_size, pause)
+        _delete_batches(model, model._meta.pk.column, ids, batch_size, pause)
+        storage = model._meta.get_field(file_field).storage
+        for _, name in rows:
+            delete_unreferenced(storage, name)
+        purged += len(ids)
+        time.sleep(pause)
+
+
+def purge_recipes(batch_size=500, pause=0):
+    return _purge(
+        Recipe,
+        Recipe.all_objects.filter(deleted_at__isnull=False),
+        'image',
+        batch_size,
+        pause
+    )
+
+
+def purge_users(batch_size=500, pause=0):
+    recipes = Recipe.all_objects.filter(
+        author__deleted_at__isnull=False, deleted_at__isnull=True)
+    ingredient_ids = recipe_ingredient_ids(recipes.values('pk'))
+    if recipes.update(deleted_at=timezone.now()):
+        refresh_usage(ingredient_ids)
+        invalidate_counts(Recipe)
+    purge_recipes(batch_size, pause)
+    return _purge(
+        User,
+        User.objects.filter(deleted_at__isnull=False),
+        'avatar',
+        batch_size,
+        pause,
+        skip=(Recipe,)
+    )
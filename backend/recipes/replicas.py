@@ -0,0 +1,107 @@
+import random
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULT_DB_ALIAS = 'default'
+REPLICA_PREFIX = 'replica'
+CACHE_APP_LABEL = 'django_cache'
+REPLICA_LAG_SQL = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) '
+    'END'
+)
+
+# Реплика выбирается один раз на запрос, чтобы все его чтения видели
+# одно и то же состояние базы.
+replica_alias = ContextVar('replica_alias', default=None)
+
+
+def recently_wrote(user):
+    return user.is_authenticated and (
+        timezone.now() - user.updated_at
+        < timedelta(seconds=settings.REPLICA_STICKY_SECONDS)
+    )
+
+
+class ReplicaLagMonitor:
+
+    def __init__(self):
+        self.checked = {}
+
+    def measure(self, alias):
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = cursor.fetchone()[0]
+        return float(lag or 0)
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        checked_at, healthy = self.checked.get(alias, (None, True))
+        if (
+            checked_at is None
+            or now - checked_at > settings.REPLICA_LAG_CHECK_INTERVAL
+        ):
+            try:
+                healthy = self.measure(alias) <= settings.REPLICA_MAX_LAG
+            except DatabaseError:
+                healthy = False
+            self.checked[alias] = (now, healthy)
+        return healthy
+
+
+lag_monitor = ReplicaLagMonitor()
+
+
+def choose_replica():
+    healthy = [
+        alias for alias in settings.DATABASES
+        if alias.startswith(REPLICA_PREFIX) and lag_monitor.is_healthy(alias)
+    ]
+    return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter:
+    """Читает из реплик внутри ReplicaReadMixin, пишет в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        # Общий кэш в базе читается из основной базы: отставание реплики
+        # вернуло бы устаревшие поколения.
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        return replica_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы идут в реплики, пока пользователь ничего не менял."""
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_alias.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_alias.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and not recently_wrote(request.user)
+        ):
+            replica_alias.set(choose_replica())
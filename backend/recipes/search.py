@@ -0,0 +1,323 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from itertools import islice
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+
+from .cache import SHARED_CACHE, bump_generation, get_generation
+from .models import Ingredient
+
+INDEX_GENERATION_CACHE_KEY = 'recipes:ingredient-index-generation'
+INDEX_CHANGE_CACHE_KEY = 'recipes:ingredient-index-change:{}'
+INDEX_CHANGE_CACHE_TIMEOUT = 24 * 60 * 60
+MAX_INDEX_CHANGES = 1000
+
+MIN_FUZZY_QUERY_LENGTH = 3
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    return ' '.join(
+        NON_WORD_RE.sub(' ', text.lower().replace('ё', 'е')).split())
+
+
+def trigrams(text):
+    """Триграммы слов строки с дополнением пробелами, как в pg_trgm."""
+    result = set()
+    for word in text.split():
+        padded = f'  {word} '
+        result.update(
+            padded[index:index + 3] for index in range(len(padded) - 2))
+    return frozenset(result)
+
+
+class TrigramIndex:
+    """
+    Индекс триграмм названий ингредиентов в памяти процесса.
+
+    Строится при прогреве воркера и обновляется сигналами. Каждое
+    изменение увеличивает поколение в общем кэше (CACHES['shared'])
+    и сохраняется там под этим поколением, поэтому другие процессы
+    при следующем поиске применяют пропущенные изменения. Если их
+    слишком много или часть уже вытеснена из кэша, индекс
+    перестраивается в фоновом потоке, а поиск до конца перестройки
+    идёт по старому индексу. Число использований ингредиентов
+    перечитывается из базы при поиске, если загружено больше
+    INGREDIENT_USAGE_CACHE_TIMEOUT секунд назад.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.generation = None
+        self.entries = {}
+        self.postings = defaultdict(set)
+        self.usage = {}
+        self.max_usage = 0
+        self.usage_loaded_at = None
+        self.rebuilding = False
+
+    def _add(self, pk, name, unit_id, unit_name):
+        normalized = normalize(name)
+        grams = trigrams(normalized)
+        self.entries[pk] = (name, unit_id, unit_name, normalized, grams)
+        for gram in grams:
+            self.postings[gram].add(pk)
+
+    def _remove(self, pk):
+        entry = self.entries.pop(pk, None)
+        if entry is None:
+            return
+        for gram in entry[4]:
+            self.postings[gram].discard(pk)
+            if not self.postings[gram]:
+                del self.postings[gram]
+
+    def load(self, rows, generation=None):
+        """
+        Заполняет индекс строками (id, название, id единицы, название
+        единицы). Новый индекс собирается отдельно и подменяет старый
+        целиком, чтобы поиск не ждал загрузки.
+        """
+        index = TrigramIndex()
+        for pk, name, unit_id, unit_name in rows:
+            index._add(pk, name, unit_id, unit_name)
+        with self.lock:
+            self.entries = index.entries
+            self.postings = index.postings
+            self.generation = generation
+        return len(index.entries)
+
+    def build(self):
+        generation = get_generation(INDEX_GENERATION_CACHE_KEY)
+        count = self.load(
+            Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit_id',
+                'measurement_unit__name'
+            ).iterator(),
+            generation
+        )
+        self.load_usage()
+        return count
+
+    def load_usage(self, usage=None):
+        if usage is None:
+            usage = dict(Ingredient.objects.filter(
+                usage_count__gt=0).values_list('id', 'usage_count'))
+        with self.lock:
+            self.usage = usage
+            self.max_usage = max(usage.values(), default=0)
+            self.usage_loaded_at = time.monotonic()
+
+    def set_usage(self, usage):
+        with self.lock:
+            for pk, count in usage.items():
+                if count:
+                    self.usage[pk] = count
+                else:
+                    self.usage.pop(pk, None)
+            self.max_usage = max(self.max_usage, *usage.values(), 0)
+
+    def _rename_unit(self, unit_id, unit_name):
+        for pk, entry in self.entries.items():
+            if entry[1] == unit_id:
+                self.entries[pk] = (*entry[:2], unit_name, *entry[3:])
+
+    def _apply(self, change):
+        action, *args = change
+        if action == 'update':
+            self._remove(args[0])
+            self._add(*args)
+        elif action == 'remove':
+            self._remove(*args)
+        elif action == 'unit':
+            self._rename_unit(*args)
+
+    def _publish(self, change):
+        with self.lock:
+            self._apply(change)
+            generation = bump_generation(INDEX_GENERATION_CACHE_KEY)
+            caches[SHARED_CACHE].set(
+                INDEX_CHANGE_CACHE_KEY.format(generation), change,
+                INDEX_CHANGE_CACHE_TIMEOUT
+            )
+            # Чужие изменения между поколениями применит ensure_current,
+            # поэтому новое поколение принимается, только если пропусков
+            # нет.
+            if (
+                self.generation is not None
+                and generation == self.generation + 1
+            ):
+                self.generation = generation
+
+    def update(self, pk, name, unit_id, unit_name):
+        self._publish(('update', pk, name, unit_id, unit_name))
+
+    def rename_unit(self, unit_id, unit_name):
+        self._publish(('unit', unit_id, unit_name))
+
+    def remove(self, pk):
+        self._publish(('remove', pk))
+
+    def _catch_up(self, generation):
+        """Применяет изменения других процессов до поколения generation."""
+        with self.lock:
+            if not 0 < generation - self.generation <= MAX_INDEX_CHANGES:
+                return False
+            keys = [
+                INDEX_CHANGE_CACHE_KEY.format(missed) for missed in range(
+                    self.generation + 1, generation + 1)
+            ]
+            changes = caches[SHARED_CACHE].get_many(keys)
+            if len(changes) != len(keys):
+                return False
+            for key in keys:
+                self._apply(changes[key])
+            self.generation = generation
+        return True
+
+    def _rebuild(self):
+        try:
+            self.build()
+        finally:
+            self.rebuilding = False
+            connections.close_all()
+
+    def rebuild_in_background(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(
+            target=self._rebuild, name='ingredient-index', daemon=True
+        ).start()
+
+    def ensure_current(self):
+        generation = get_generation(INDEX_GENERATION_CACHE_KEY)
+        if self.generation is None:
+            self.build()
+        elif generation != self.generation:
+            if not self._catch_up(generation):
+                self.rebuild_in_background()
+        elif (
+            self.usage_loaded_at is None
+            or time.monotonic() - self.usage_loaded_at
+            > settings.INGREDIENT_USAGE_CACHE_TIMEOUT
+        ):
+            self.load_usage()
+
+    def popularity(self, pk, recent, max_recent):
+        """Прибавка к сходству за частое и недавнее использование."""
+        score = 0
+        if self.max_usage:
+            score += settings.INGREDIENT_USAGE_WEIGHT * (
+                math.log1p(self.usage.get(pk, 0))
+                / math.log1p(self.max_usage)
+            )
+        if max_recent:
+            score += settings.INGREDIENT_RECENT_WEIGHT * (
+                recent.get(pk, 0) / max_recent)
+        return score
+
+    def _candidates(self, grams, threshold, limit):
+        # Сходство не превышает доли общих триграмм запроса, поэтому
+        # подходящее название содержит хотя бы одну из самых редких
+        # len(grams) - required + 1 триграмм. Число кандидатов
+        # ограничено, чтобы время ответа не росло с размером индекса.
+        required = max(1, math.ceil(threshold * len(grams)))
+        lists = sorted(
+            (self.postings.get(gram, ()) for gram in grams), key=len)
+        candidates = set()
+        for posting in lists[:len(grams) - required + 1]:
+            candidates.update(islice(posting, limit - len(candidates)))
+            if len(candidates) >= limit:
+                break
+        return candidates
+
+    def _prefix_matches(self, grams, normalized):
+        # Название, начинающееся с запроса, содержит все его триграммы,
+        # кроме, возможно, завершающих недописанное последнее слово.
+        lists = sorted(
+            (
+                self.postings.get(gram, set())
+                for gram in grams if not gram.endswith(' ')
+            ),
+            key=len
+        )
+        return {
+            pk for pk in lists[0].intersection(*lists[1:])
+            if self.entries[pk][3].startswith(normalized)
+        }
+
+    def search(self, query, limit=None, threshold=None, recent=None):
+        """
+        Ингредиенты, похожие на запрос, по убыванию сходства с учётом
+        популярности и недавнего использования из recent.
+        Названия, начинающиеся с запроса, идут первыми.
+        """
+        if limit is None:
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+        if threshold is None:
+            threshold = settings.INGREDIENT_SEARCH_THRESHOLD
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        grams = trigrams(normalized)
+        recent = recent or {}
+        max_recent = max(recent.values(), default=0)
+        self.ensure_current()
+        with self.lock:
+            prefix = self._prefix_matches(grams, normalized)
+            candidates = prefix
+            # Одна-две буквы почти ничего не говорят о сходстве, поэтому
+            # для коротких запросов ищется только совпадение начала.
+            if len(normalized) >= MIN_FUZZY_QUERY_LENGTH:
+                candidates = prefix | self._candidates(
+                    grams, threshold, settings.INGREDIENT_SEARCH_CANDIDATES)
+            scored = []
+            for pk in candidates:
+                name, _, unit_name, _, entry_grams = self.entries[pk]
+                shared = len(grams & entry_grams)
+                similarity = shared / (len(grams) + len(entry_grams) - shared)
+                if pk in prefix or similarity >= threshold:
+                    score = similarity + self.popularity(
+                        pk, recent, max_recent)
+                    scored.append(
+                        (pk not in prefix, -score, name, pk, unit_name))
+        return [
+            {
+                'id': pk,
+                'name': name,
+                'measurement_unit': unit_name,
+            }
+            for _, _, name, pk, unit_name in heapq.nsmallest(limit, scored)
+        ]
+
+
+ingredient_index = TrigramIndex()
+
+
+def index_ingredient(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: ingredient_index.update(
+        instance.pk, instance.name, instance.measurement_unit_id,
+        instance.measurement_unit.name
+    ))
+
+
+def unindex_ingredient(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: ingredient_index.remove(pk))
+
+
+def reindex_unit(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    transaction.on_commit(
+        lambda: ingredient_index.rename_unit(instance.pk, instance.name))
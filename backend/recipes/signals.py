@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db.models import signals
+
+from .cache import invalidate_counts, invalidate_tags
+from .documents import documents_rebuilt, rebuild_documents
+from .models import Ingredient, MeasurementUnit, Recipe, RecipeIngredient, Tag
+from .search import index_ingredient, reindex_unit, unindex_ingredient
+from .tasks import render_pages
+from .usage import invalidate_top_usage, recipe_ingredient_ids, refresh_usage
+
+User = get_user_model()
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name', 'avatar'}
+
+signals.post_save.connect(invalidate_tags, sender=Tag)
+signals.post_delete.connect(invalidate_tags, sender=Tag)
+signals.post_save.connect(reindex_unit, sender=MeasurementUnit)
+signals.post_save.connect(index_ingredient, sender=Ingredient)
+signals.post_delete.connect(unindex_ingredient, sender=Ingredient)
+for model in (Ingredient, MeasurementUnit):
+    signals.post_save.connect(invalidate_top_usage, sender=model)
+    signals.post_delete.connect(invalidate_top_usage, sender=model)
+for model in (Recipe, User):
+    signals.post_save.connect(invalidate_counts, sender=model)
+    signals.post_delete.connect(invalidate_counts, sender=model)
+
+
+def _affected_recipes(instance):
+    if isinstance(instance, Tag):
+        return Recipe.objects.filter(tags=instance)
+    if isinstance(instance, Ingredient):
+        return Recipe.objects.filter(
+            pk__in=RecipeIngredient.objects.filter(
+                ingredient=instance).values('recipe_id'))
+    if isinstance(instance, MeasurementUnit):
+        return Recipe.objects.filter(
+            pk__in=RecipeIngredient.objects.filter(
+                ingredient__measurement_unit=instance).values('recipe_id'))
+    return Recipe.objects.filter(author=instance)
+
+
+def remember_author_changes(sender, instance, raw=False, update_fields=None,
+                            **kwargs):
+    """Отмечает, изменились ли поля автора, встроенные в документы."""
+    instance._author_changed = False
+    fields = AUTHOR_FIELDS
+    if update_fields is not None:
+        fields = fields & set(update_fields)
+    if raw or instance.pk is None or not fields:
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._author_changed = stored is None or any(
+        field.get_prep_value(field.value_from_object(instance))
+        != stored[field.name]
+        for field in (sender._meta.get_field(name) for name in fields)
+    )
+
+
+def rebuild_affected_documents(sender, instance, created=False, raw=False,
+                               **kwargs):
+    if created or raw:
+        return
+    if sender is User and not instance._author_changed:
+        return
+    rebuild_documents(
+        _affected_recipes(instance).values_list('pk', flat=True))
+
+
+def remember_affected_recipes(sender, instance, **kwargs):
+    instance._affected_recipe_ids = list(
+        _affected_recipes(instance).values_list('pk', flat=True))
+
+
+def rebuild_remembered_documents(sender, instance, **kwargs):
+    rebuild_documents(getattr(instance, '_affected_recipe_ids', []))
+
+
+signals.pre_save.connect(remember_author_changes, sender=User)
+for model in (Tag, Ingredient, MeasurementUnit, User):
+    signals.post_save.connect(rebuild_affected_documents, sender=model)
+for model in (Tag, Ingredient):
+    signals.pre_delete.connect(remember_affected_recipes, sender=model)
+    signals.post_delete.connect(rebuild_remembered_documents, sender=model)
+
+
+def render_rebuilt_pages(sender, recipe_ids, **kwargs):
+    render_pages.delay(recipe_ids)
+
+
+documents_rebuilt.connect(render_rebuilt_pages)
+
+
+def refresh_deleted_recipe_usage(sender, instance, update_fields=None,
+                                 **kwargs):
+    if update_fields is None or 'deleted_at' not in update_fields:
+        return
+    refresh_usage(recipe_ingredient_ids([instance.pk]), [instance.author_id])
+
+
+signals.post_save.connect(refresh_deleted_recipe_usage, sender=Recipe)
+
+
+def refresh_deleted_author_usage(sender, instance, update_fields=None,
+                                 **kwargs):
+    # Рецепты удалённого автора помечаются массовым update() без сигналов.
+    if update_fields is None or 'deleted_at' not in update_fields:
+        return
+    refresh_usage(
+        recipe_ingredient_ids(
+            Recipe.all_objects.filter(author=instance).values('pk')),
+        [instance.pk]
+    )
+    invalidate_counts(Recipe)
+
+
+signals.post_save.connect(refresh_deleted_author_usage, sender=User)
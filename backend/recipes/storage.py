@@ -0,0 +1,74 @@
+import hashlib
+import os
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+
+from .models import Recipe
+
+User = get_user_model()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Именует файлы по SHA-256 содержимого, одинаковые загрузки не дублирует.
+
+    Один файл может использоваться несколькими объектами, поэтому удалять
+    его можно только через delete_unreferenced или команду gc_media.
+    Повторная загрузка обновляет время изменения файла: объект, который
+    на него сошлётся, ещё не сохранён, и файл защищает только
+    MEDIA_ORPHAN_MIN_AGE.
+    """
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], f'{digest}{extension}')
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length)
+        return name
+
+
+def referenced_media():
+    """Все пути файлов, на которые ссылаются рецепты и пользователи."""
+    for queryset in (
+        Recipe.all_objects.values_list('image', flat=True),
+        User.objects.values_list('avatar', flat=True),
+    ):
+        for name in queryset.iterator():
+            if name:
+                yield name
+
+
+def referenced_names(names):
+    """Пути из names, на которые сейчас ссылаются рецепты и пользователи."""
+    names = list(names)
+    return {
+        *Recipe.all_objects.filter(
+            image__in=names).values_list('image', flat=True),
+        *User.objects.filter(
+            avatar__in=names).values_list('avatar', flat=True),
+    }
+
+
+def is_recent(path, min_age=None):
+    if min_age is None:
+        min_age = settings.MEDIA_ORPHAN_MIN_AGE
+    try:
+        return os.stat(path).st_mtime > time.time() - min_age
+    except FileNotFoundError:
+        return False
+
+
+def delete_unreferenced(storage, name):
+    # Свежий файл мог только что получить новую ссылку из параллельной
+    # загрузки, которая ещё не записана в базу.
+    if not name or is_recent(storage.path(name)) or referenced_names([name]):
+        return
+    storage.delete(name)
@@ -0,0 +1,24 @@
+from .models import Recipe
+from .pages import delete_pages, write_pages, write_sitemap
+from .purge import purge_recipes, purge_users
+from tasks.queue import task
+
+
+@task
+def purge_deleted():
+    delete_pages(Recipe.all_objects.filter(
+        deleted_at__isnull=False).values_list('id', 'short_id'))
+    purge_recipes()
+    purge_users()
+    render_sitemap.delay(unique=True)
+
+
+@task
+def render_pages(recipe_ids):
+    write_pages(recipe_ids)
+    render_sitemap.delay(unique=True)
+
+
+@task
+def render_sitemap():
+    write_sitemap()
@@ -0,0 +1,400 @@
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .cache import (
+    SHARED_CACHE,
+    TAG_GENERATION_CACHE_KEY,
+    bump_generation,
+    get_count_generation,
+    get_tag_ids_by_slug,
+)
+from .documents import rebuild_documents
+from .models import (
+    Favorite,
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    RecipeDocument,
+    RecipeIngredient,
+    Tag,
+)
+from .pages import page_dir, write_pages
+from .purge import purge_users
+from .search import INDEX_CHANGE_CACHE_KEY, TrigramIndex, ingredient_index
+from .usage import TOP_INGREDIENTS_CACHE_KEY, get_top_ingredients
+from profiling.models import RequestProfile
+
+User = get_user_model()
+
+
+class PurgeUsersTests(TestCase):
+    """Удаление пользователей пачками учитывает все ссылки на них."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='deleted', email='deleted@example.com',
+            password='password'
+        )
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='password'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        Favorite.objects.create(user=self.other, recipe=self.recipe)
+        self.profiles = [
+            RequestProfile.objects.create(
+                user=user,
+                method='GET',
+                path='/api/recipes/',
+                status_code=200,
+                duration_ms=1,
+                query_count=1,
+                query_time_ms=1,
+                stats=b'',
+            )
+            for user in (self.user, self.user, self.user, self.other)
+        ]
+
+    def test_purge_user_with_profiles(self):
+        self.user.soft_delete()
+
+        purge_users(batch_size=2)
+
+        connection.check_constraints()
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(
+            Recipe.all_objects.filter(pk=self.recipe.pk).exists())
+        self.assertFalse(Favorite.objects.exists())
+        self.assertEqual(
+            RequestProfile.objects.filter(user__isnull=True).count(), 3)
+        self.assertEqual(
+            RequestProfile.objects.get(pk=self.profiles[-1].pk).user,
+            self.other
+        )
+
+
+class DocumentRebuildTests(TestCase):
+    """Перестройка документов меняет версию рецептов для ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password'
+        )
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        unit, _ = MeasurementUnit.objects.get_or_create(name='г')
+        ingredient = Ingredient.objects.create(
+            name='Соль', measurement_unit=unit)
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        cls.recipe.tags.add(cls.tag)
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredient=ingredient, amount=5)
+        rebuild_documents([cls.recipe.pk])
+
+    def updated_at(self):
+        return Recipe.objects.values_list('updated_at', flat=True).get(
+            pk=self.recipe.pk)
+
+    def test_tag_change_invalidates_list_etag(self):
+        response = self.client.get('/api/recipes/')
+        self.tag.name = 'Обед'
+        self.tag.save()
+
+        response = self.client.get(
+            '/api/recipes/', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['tags'][0]['name'], 'Обед')
+
+    def test_documents_use_units_created_elsewhere(self):
+        rebuild_documents([self.recipe.pk])
+        # Единица создана другим процессом: сигналы здесь не срабатывают.
+        MeasurementUnit.objects.bulk_create([MeasurementUnit(name='щепоть')])
+        ingredient = Ingredient.objects.create(
+            name='Перец',
+            measurement_unit=MeasurementUnit.objects.get(name='щепоть')
+        )
+        self.recipe.ingredients.add(
+            ingredient, through_defaults={'amount': 1})
+
+        rebuild_documents([self.recipe.pk])
+
+        self.assertIn(
+            {
+                'id': ingredient.pk,
+                'name': 'Перец',
+                'measurement_unit': 'щепоть',
+                'amount': 1,
+            },
+            RecipeDocument.objects.get(
+                recipe=self.recipe).data['ingredients']
+        )
+
+    def test_author_save_without_changes_keeps_documents(self):
+        updated_at = self.updated_at()
+        self.author.set_password('new-password')
+        self.author.save()
+        self.author.last_login = timezone.now()
+        self.author.save(update_fields=['last_login'])
+
+        self.assertEqual(self.updated_at(), updated_at)
+
+    def test_author_rename_rebuilds_documents(self):
+        updated_at = self.updated_at()
+        self.author.username = 'renamed'
+        self.author.save()
+
+        self.assertGreater(self.updated_at(), updated_at)
+        self.assertEqual(
+            RecipeDocument.objects.get(
+                recipe=self.recipe).data['author']['username'],
+            'renamed'
+        )
+
+
+class RecipeListTests(TestCase):
+    """Список рецептов берёт количество из кэша и меняет ETag при записи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {index}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+            )
+            for index in range(3)
+        ]
+        rebuild_documents([recipe.pk for recipe in cls.recipes])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        self.client.get('/api/recipes/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/recipes/')
+
+        self.assertEqual(response.json()['count'], 3)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ])
+
+    def test_deleting_older_recipe_changes_etag(self):
+        response = self.client.get('/api/recipes/')
+        self.recipes[0].soft_delete()
+
+        response = self.client.get(
+            '/api/recipes/', HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+
+class IngredientUsageTests(TestCase):
+    """Удаление автора пересчитывает использование ингредиентов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password'
+        )
+        unit, _ = MeasurementUnit.objects.get_or_create(name='г')
+        cls.ingredient = Ingredient.objects.create(
+            name='Соль', measurement_unit=unit, usage_count=1)
+        recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=cls.ingredient, amount=5)
+
+    def test_author_soft_delete_refreshes_usage(self):
+        get_top_ingredients(10)
+        generation = get_count_generation(Recipe)
+
+        self.author.soft_delete()
+
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.usage_count, 0)
+        self.assertIsNone(
+            caches[SHARED_CACHE].get(TOP_INGREDIENTS_CACHE_KEY))
+        self.assertGreater(get_count_generation(Recipe), generation)
+
+    def test_top_ingredients_use_current_unit_names(self):
+        get_top_ingredients(10)
+        MeasurementUnit.objects.bulk_create([MeasurementUnit(name='щепоть')])
+        Ingredient.objects.create(
+            name='Перец',
+            measurement_unit=MeasurementUnit.objects.get(name='щепоть'),
+            usage_count=5
+        )
+
+        self.assertEqual(
+            get_top_ingredients(1),
+            [{
+                'id': Ingredient.objects.get(name='Перец').pk,
+                'name': 'Перец',
+                'measurement_unit': 'щепоть',
+            }]
+        )
+
+
+class TagCacheTests(TestCase):
+    """Кэш тегов сбрасывается во всех процессах по общему поколению."""
+
+    def setUp(self):
+        cache.clear()
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def test_tag_saved_in_another_process(self):
+        get_tag_ids_by_slug()
+        # Другой процесс сохраняет тег: кэш этого процесса он не видит,
+        # но увеличивает общее поколение.
+        Tag.objects.bulk_create([Tag(name='Обед', slug='lunch')])
+        bump_generation(TAG_GENERATION_CACHE_KEY)
+
+        response = self.client.get('/api/recipes/', {'tags': 'lunch'})
+
+        self.assertIn('lunch', get_tag_ids_by_slug())
+        self.assertEqual(response.status_code, 200)
+
+    def test_bootstrap_tags_saved_in_another_process(self):
+        self.client.get('/api/bootstrap/')
+        Tag.objects.filter(slug='breakfast').update(name='Ужин')
+        bump_generation(TAG_GENERATION_CACHE_KEY)
+
+        response = self.client.get('/api/bootstrap/')
+
+        self.assertEqual(response.json()['tags'][0]['name'], 'Ужин')
+
+
+class StaticPageTests(TestCase):
+    """Статические страницы рецептов пригодны для превью ссылок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+
+    def test_og_image_is_absolute(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_PAGES_ROOT=root, SITE_URL='https://foodgram.example'
+        ):
+            write_pages([self.recipe.pk])
+            with open(
+                os.path.join(page_dir(self.recipe.pk), 'index.html'),
+                encoding='utf-8'
+            ) as file:
+                html = file.read()
+
+        self.assertIn(
+            '<meta property="og:image" content="https://foodgram.example'
+            '/media/recipes/images/recipe.png">',
+            html
+        )
+
+
+class IngredientSearchTests(TestCase):
+    """Результаты поиска содержат актуальные названия единиц."""
+
+    def setUp(self):
+        cache.clear()
+        unit, _ = MeasurementUnit.objects.get_or_create(name='г')
+        Ingredient.objects.create(name='Соль', measurement_unit=unit)
+        ingredient_index.build()
+        ingredient_index.search('соль')
+
+    def search_unit(self, query):
+        return ingredient_index.search(query)[0]['measurement_unit']
+
+    def test_unit_created_in_another_process(self):
+        MeasurementUnit.objects.bulk_create([MeasurementUnit(name='щепоть')])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(
+                name='Перец',
+                measurement_unit=MeasurementUnit.objects.get(name='щепоть')
+            )
+
+        self.assertEqual(self.search_unit('перец'), 'щепоть')
+
+    def test_unit_rename(self):
+        unit = MeasurementUnit.objects.get(name='г')
+        unit.name = 'грамм'
+        with self.captureOnCommitCallbacks(execute=True):
+            unit.save()
+
+        self.assertEqual(self.search_unit('соль'), 'грамм')
+
+    def test_changes_from_another_process_are_applied(self):
+        index = TrigramIndex()
+        index.build()
+        other = TrigramIndex()
+        other.build()
+        unit = MeasurementUnit.objects.get(name='г')
+        other.update(1000, 'Перец', unit.pk, unit.name)
+        other.rename_unit(unit.pk, 'грамм')
+
+        with mock.patch.object(index, 'rebuild_in_background') as rebuild:
+            results = index.search('перец')
+
+        rebuild.assert_not_called()
+        self.assertEqual(results[0]['name'], 'Перец')
+        self.assertEqual(results[0]['measurement_unit'], 'грамм')
+        self.assertEqual(index.generation, other.generation)
+
+    def test_missing_changes_rebuild_in_background(self):
+        index = TrigramIndex()
+        index.build()
+        other = TrigramIndex()
+        other.build()
+        other.update(1000, 'Перец', None, None)
+        caches[SHARED_CACHE].delete(
+            INDEX_CHANGE_CACHE_KEY.format(other.generation))
+
+        with mock.patch.object(index, 'rebuild_in_background') as rebuild:
+            results = index.search('соль')
+
+        rebuild.assert_called_once_with()
+        self.assertEqual(results[0]['name'], 'Соль')
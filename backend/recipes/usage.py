@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .cache import SHARED_CACHE
+from .models import Ingredient, Recipe, RecipeIngredient
+from .search import ingredient_index
+
+TOP_INGREDIENTS_CACHE_KEY = 'recipes:top-ingredients'
+RECENT_USAGE_CACHE_KEY = 'recipes:recent-ingredients:{}'
+
+
+def recipe_ingredient_ids(recipe_ids):
+    return set(RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids).values_list('ingredient_id', flat=True))
+
+
+def refresh_usage(ingredient_ids, author_ids=()):
+    """
+    Пересчитывает число неудалённых рецептов только для затронутых
+    ингредиентов и сбрасывает самые используемые ингредиенты
+    и недавнее использование авторов.
+    """
+    ingredient_ids = list(ingredient_ids)
+    if ingredient_ids:
+        Ingredient.objects.filter(pk__in=ingredient_ids).update(
+            usage_count=Coalesce(Subquery(
+                RecipeIngredient.objects.filter(
+                    ingredient=OuterRef('pk'),
+                    recipe__deleted_at__isnull=True
+                ).values('ingredient').annotate(
+                    total=Count('pk')).values('total')
+            ), 0)
+        )
+        invalidate_top_usage()
+    cache.delete_many(
+        [RECENT_USAGE_CACHE_KEY.format(author_id) for author_id in author_ids])
+
+    def publish():
+        ingredient_index.set_usage(dict(Ingredient.objects.filter(
+            pk__in=ingredient_ids).values_list('id', 'usage_count')))
+
+    if ingredient_ids:
+        transaction.on_commit(publish)
+
+
+def invalidate_top_usage(**kwargs):
+    caches[SHARED_CACHE].delete(TOP_INGREDIENTS_CACHE_KEY)
+
+
+def get_top_ingredients(limit):
+    """
+    Самые используемые ингредиенты, не больше INGREDIENT_TOP_LIMIT.
+    Хранятся в общем кэше, чтобы refresh_usage сбрасывал их для всех
+    процессов.
+    """
+    def top_ingredients():
+        return [
+            {
+                'id': pk,
+                'name': name,
+                'measurement_unit': unit_name,
+            }
+            for pk, name, unit_name in Ingredient.objects.order_by(
+                '-usage_count', 'name'
+            ).values_list(
+                'id', 'name', 'measurement_unit__name'
+            )[:settings.INGREDIENT_TOP_LIMIT]
+        ]
+
+    return caches[SHARED_CACHE].get_or_set(
+        TOP_INGREDIENTS_CACHE_KEY, top_ingredients,
+        settings.INGREDIENT_USAGE_CACHE_TIMEOUT
+    )[:limit]
+
+
+def get_recent_usage(user):
+    """Сколько раз ингредиенты встречались в последних рецептах автора."""
+    def recent_usage():
+        recipe_ids = list(Recipe.objects.filter(author=user).values_list(
+            'pk', flat=True)[:settings.INGREDIENT_RECENT_RECIPES])
+        return dict(RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values('ingredient_id').annotate(
+            total=Count('pk')).values_list('ingredient_id', 'total'))
+
+    if not user.is_authenticated:
+        return {}
+    return cache.get_or_set(
+        RECENT_USAGE_CACHE_KEY.format(user.pk), recent_usage,
+        settings.INGREDIENT_USAGE_CACHE_TIMEOUT
+    )
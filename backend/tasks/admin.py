@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'status', 'attempts', 'max_attempts',
+        'run_at', 'started_at', 'finished_at'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+    readonly_fields = (
+        'attempts', 'created_at', 'started_at', 'finished_at', 'last_error'
+    )
+    show_full_result_count = False
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.update(
+            status=Task.PENDING, attempts=0, run_at=timezone.now())
@@ -0,0 +1,2 @@
+MAX_TASK_NAME_LENGTH = 128
+MAX_TASK_STATUS_LENGTH = 16
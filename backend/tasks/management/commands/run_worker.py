@@ -0,0 +1,83 @@
+import multiprocessing
+import signal
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.queue import autodiscover, prune_finished, run_next
+
+
+def work(stop, burst, poll_interval):
+    try:
+        while not stop.is_set():
+            if not run_next():
+                if burst:
+                    return
+                stop.wait(poll_interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of parallel workers',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Run workers in threads or in forked processes',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        autodiscover()
+        poll_interval = settings.TASK_POLL_INTERVAL
+        if options['pool'] == 'process':
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            worker_class = context.Process
+        else:
+            stop = threading.Event()
+            worker_class = threading.Thread
+
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+        workers = [
+            worker_class(
+                target=work, args=(stop, options['burst'], poll_interval))
+            for _ in range(options['concurrency'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(
+            f'Started {len(workers)} {options["pool"]} workers')
+        # Основной поток только ждёт воркеров и время от времени
+        # удаляет старые завершённые задачи.
+        next_prune = time.monotonic()
+        try:
+            while workers:
+                if time.monotonic() >= next_prune:
+                    self.stdout.write(
+                        f'Pruned {prune_finished()} finished tasks')
+                    next_prune = (
+                        time.monotonic() + settings.TASK_PRUNE_INTERVAL)
+                workers[0].join(poll_interval)
+                workers = [worker for worker in workers if worker.is_alive()]
+        finally:
+            connections.close_all()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
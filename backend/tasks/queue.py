@@ -0,0 +1,124 @@
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class TaskFunction:
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, unique=False, **kwargs):
+        """Ставит задачу в очередь после коммита текущей транзакции."""
+        def create():
+            if unique and Task.objects.filter(
+                name=self.name, status=Task.PENDING,
+                args=list(args), kwargs=kwargs
+            ).exists():
+                return
+            Task.objects.create(
+                name=self.name,
+                args=list(args),
+                kwargs=kwargs,
+                max_attempts=self.max_attempts
+            )
+
+        transaction.on_commit(create)
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    def register(func):
+        task_function = TaskFunction(
+            func,
+            name or f'{func.__module__}.{func.__name__}',
+            max_attempts or settings.TASK_MAX_ATTEMPTS
+        )
+        registry[task_function.name] = task_function
+        return task_function
+
+    return register(func) if func else register
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def claim_next():
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASK_TIMEOUT)
+    with transaction.atomic():
+        task = Task.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Task.PENDING, run_at__lte=now)
+            | Q(status=Task.RUNNING, started_at__lt=stale)
+        ).order_by('run_at').first()
+        if task is None:
+            return None
+        task.status = Task.RUNNING
+        task.started_at = now
+        task.attempts += 1
+        task.save(update_fields=['status', 'started_at', 'attempts'])
+    return task
+
+
+def execute(task):
+    try:
+        registry[task.name](*task.args, **task.kwargs)
+    except Exception:
+        task.last_error = traceback.format_exc()
+        logger.exception('Task %s #%s failed', task.name, task.pk)
+        if task.attempts < task.max_attempts:
+            task.status = Task.PENDING
+            task.run_at = timezone.now() + timedelta(seconds=min(
+                settings.TASK_RETRY_BACKOFF * 2 ** (task.attempts - 1),
+                settings.TASK_RETRY_BACKOFF_MAX
+            ))
+        else:
+            task.status = Task.FAILED
+            task.finished_at = timezone.now()
+    else:
+        task.status = Task.DONE
+        task.finished_at = timezone.now()
+    task.save(update_fields=[
+        'status', 'run_at', 'finished_at', 'last_error'])
+
+
+def run_next():
+    close_old_connections()
+    task = claim_next()
+    if task is None:
+        return False
+    execute(task)
+    return True
+
+
+def prune_finished():
+    """Удаляет завершённые задачи старше сроков хранения."""
+    now = timezone.now()
+    deleted, _ = Task.objects.filter(
+        Q(
+            status=Task.DONE,
+            finished_at__lt=now - timedelta(days=settings.TASK_DONE_RETENTION)
+        )
+        | Q(
+            status=Task.FAILED,
+            finished_at__lt=now - timedelta(
+                days=settings.TASK_FAILED_RETENTION)
+        )
+    ).delete()
+    return deleted
@@ -1,9 +1,25 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
 from django.db.models import Count
 
-from recipes.forms import RecipeForm, RecipeIngredientFormSet
-from recipes.models import Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.documents import rebuild_documents
+from recipes.forms import (
+    PreloadedAutocompleteSelect,
+    RecipeForm,
+    RecipeIngredientFormSet,
+)
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+)
+from recipes.tasks import purge_deleted
+from recipes.usage import recipe_ingredient_ids, refresh_usage
 
 User = get_user_model()
 
@@ -11,21 +27,78 @@ User = get_user_model()
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     formset = RecipeIngredientFormSet
+    autocomplete_fields = ('ingredient',)
     extra = 1
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'ingredient':
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'ingredient__measurement_unit', 'recipe')
+
+
+class SoftDeleteAdminMixin:
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            []
+        )
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+        purge_deleted.delay(unique=True)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.soft_delete()
+        purge_deleted.delay(unique=True)
+
+
+class RecipeChangeList(ChangeList):
+
+    def get_results(self, request):
+        super().get_results(request)
+        recipes = list(self.result_list)
+        favorites = dict(
+            Favorite.objects.filter(recipe__in=[
+                recipe.pk for recipe in recipes
+            ]).values('recipe').annotate(
+                total=Count('id')).values_list('recipe', 'total')
+        )
+        for recipe in recipes:
+            recipe.total_favorites = favorites.get(recipe.pk, 0)
+
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     form = RecipeForm
     list_display = ('name', 'author', 'total_favorites')
+    list_select_related = ('author',)
     search_fields = ('name', 'author__username', 'author__email')
     list_filter = ('tags',)
+    autocomplete_fields = ('author', 'tags')
+    show_full_result_count = False
     inlines = [RecipeIngredientInline]
 
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        queryset = queryset.annotate(total_favorites=Count('favorited_by'))
-        return queryset
+    def get_changelist(self, request, **kwargs):
+        return RecipeChangeList
+
+    def save_related(self, request, form, formsets, change):
+        ingredient_ids = recipe_ingredient_ids([form.instance.pk])
+        super().save_related(request, form, formsets, change)
+        rebuild_documents([form.instance.pk])
+        refresh_usage(
+            ingredient_ids | recipe_ingredient_ids([form.instance.pk]),
+            [form.instance.author_id]
+        )
 
     def total_favorites(self, obj):
         return obj.total_favorites
@@ -34,16 +107,41 @@ class RecipeAdmin(admin.ModelAdmin):
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('name', 'measurement_unit')
+    list_display = ('name', 'measurement_unit', 'usage_count')
+    list_select_related = ('measurement_unit',)
+    search_fields = ('name',)
+    autocomplete_fields = ('measurement_unit',)
+
+
+@admin.register(MeasurementUnit)
+class MeasurementUnitAdmin(admin.ModelAdmin):
+    list_display = ('name', 'base_unit', 'factor')
+    list_select_related = ('base_unit',)
     search_fields = ('name',)
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(admin.ModelAdmin):
+    list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+
+
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff')
     search_fields = ('email', 'username')
     list_filter = ('is_staff', 'is_superuser', 'is_active')
 
-
-admin.site.register(Tag)
-admin.site.register(Favorite)
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name == 'user_permissions':
+            # Название права включает его тип содержимого.
+            kwargs['queryset'] = Permission.objects.select_related(
+                'content_type')
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from recipes.constants import MAX_EMAIL_LENGTH, MAX_USER_LENGTH
 from recipes.validators import username_validator, validate_username
@@ -41,6 +42,17 @@ class CustomUser(AbstractUser):
         null=True,
         blank=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False
+    )
 
     class Meta:
 
@@ -50,6 +62,22 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    @transaction.atomic
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.is_active = False
+        # Рецепты помечаются до сохранения, чтобы обработчики post_save
+        # пересчитали использование ингредиентов уже без них.
+        self.recipes.update(
+            deleted_at=self.deleted_at, updated_at=self.deleted_at)
+        self.save(update_fields=['deleted_at', 'is_active', 'updated_at'])
+
+    def touch(self):
+        """Отмечает изменение избранного, корзины или подписок."""
+        self.updated_at = timezone.now()
+        type(self).objects.filter(pk=self.pk).update(
+            updated_at=self.updated_at)
+
 
 User = get_user_model()
 
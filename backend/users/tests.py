@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.urls import reverse
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+)
+
+User = get_user_model()
+
+
+class AdminQueryCountTests(TestCase):
+    """Число запросов страниц админки не зависит от числа строк."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        unit, _ = MeasurementUnit.objects.get_or_create(name='г')
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {index}', slug=f'tag-{index}')
+            for index in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit=unit)
+            for index in range(5)
+        ]
+        for index in range(5):
+            cls.create_recipe(index)
+
+    @classmethod
+    def create_recipe(cls, index):
+        author = User.objects.create_user(
+            username=f'author{index}',
+            email=f'author{index}@example.com',
+            password='password',
+        )
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f'Рецепт {index}',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        recipe.tags.set(cls.tags)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in cls.ingredients[:index + 1]
+        ])
+        Favorite.objects.create(user=author, recipe=recipe)
+        return recipe
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assert_page_queries(self, count, url):
+        # Типы содержимого кэшируются в процессе после первого запроса.
+        ContentType.objects.clear_cache()
+        with self.assertNumQueries(count):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_recipe_changelist(self):
+        url = reverse('admin:recipes_recipe_changelist')
+        self.assert_page_queries(6, url)
+        self.create_recipe(5)
+        self.assert_page_queries(6, url)
+
+    def test_recipe_change(self):
+        recipe = Recipe.objects.get(name='Рецепт 0')
+        self.assert_page_queries(
+            10, reverse('admin:recipes_recipe_change', args=[recipe.pk]))
+        recipe = Recipe.objects.get(name='Рецепт 4')
+        response = self.assert_page_queries(
+            10, reverse('admin:recipes_recipe_change', args=[recipe.pk]))
+        for ingredient in self.ingredients:
+            self.assertContains(
+                response,
+                f'<option value="{ingredient.pk}" selected>'
+                f'{ingredient.name}</option>',
+                html=True
+            )
+
+    def test_user_changelist(self):
+        url = reverse('admin:users_customuser_changelist')
+        self.assert_page_queries(5, url)
+        self.create_recipe(5)
+        self.assert_page_queries(5, url)
+
+    def test_user_change(self):
+        user = User.objects.get(username='author0')
+        self.assert_page_queries(
+            10, reverse('admin:users_customuser_change', args=[user.pk]))